@@ -3,7 +3,7 @@ from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse, JSONResponse
 
-from src.utils.db import init_db, save_conversation, save_message, upsert_user
+from src.utils.db import init_db, close_db, save_conversation, save_messages, upsert_user
 from src.utils.memory import (
     load_short_term_memory,
     load_long_term_context,
@@ -12,25 +12,28 @@ from src.utils.memory import (
     cleanup_expired_memories,
 )
 from src.utils.cache import load_repo_cache, save_repo_cache, is_repo_indexed, save_chunk_cache, load_chunk_cache
-from src.utils.ingest import ingest_repo, fetch_repo_metadata
+from src.utils.ingest import ingest_repo, fetch_repo_metadata, close_session as close_ingest_session
 from src.utils.llm import generate_response, generate_response_stream, generate_initial_suggestions
 from src.utils.prompt import generate_prompt
 from src.utils.chunker import chunk_repo
+from langchain_core.documents import Document
 from src.utils.vectorstore import (
     ensure_index_exists,
     check_namespace_exists,
-    index_repo,
+    aindex_repo,
     query_similar,
 )
-from src.utils.reranker import rerank
-from src.utils.hybrid_search import bm25_search, reciprocal_rank_fusion
+from src.utils.reranker import rerank, close_session as close_reranker_session
+from src.utils.hybrid_search import bm25_search, get_bm25_index, reciprocal_rank_fusion, tokenize
 from src.utils.query_classifier import get_retrieval_config, cap_chunks_by_token_budget, augment_query_for_mode
 from src.utils.query_enrichment import enrich_query_with_history
+from src.utils.response_cache import make_key as response_cache_key, get_response, save_response
 from src.utils.auth import (
     exchange_code_for_token,
     get_github_user,
     get_user_repos,
     store_user_token,
+    close_session as close_github_session,
     GITHUB_CLIENT_ID,
     GITHUB_REDIRECT_URI,
     GITHUB_APP_SLUG,
@@ -50,15 +53,22 @@ from src.utils.rate_limit import (
     repo_fetch_limiter,
 )
 
-from typing import Any
+from typing import Any, AsyncIterator
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
 import re
+import asyncio
+import multiprocessing
 import json
 import time
+import orjson
 from uuid import uuid4
 
 import os
+import queue
 from dotenv import load_dotenv
 import logging
+from logging.handlers import QueueHandler, QueueListener
 
 
 load_dotenv()
@@ -68,13 +78,18 @@ IS_PROD = os.getenv("ENV") == "production"
 MAX_QUERY_LENGTH = 10_000
 MAX_HISTORY_LENGTH = 20
 MAX_CONCURRENT_CONNECTIONS = 8
+# At capacity, only a connection with no message for this long may be evicted for a new one
+CONNECTION_IDLE_EVICT_SECONDS = 10 * 60
+MAX_CACHED_REPO_DOCUMENTS = 8
+CPU_POOL_WORKERS = min(8, os.cpu_count() or 2)
+# Coalesce LLM tokens into fewer stream:chunk frames
+STREAM_FLUSH_CHARS = 256
+STREAM_FLUSH_INTERVAL_SECONDS = 0.05
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Startup/shutdown lifecycle: runs rate-limit cleanup in background."""
-    import asyncio
-
+    """Startup/shutdown lifecycle: runs rate-limit cleanup in background and owns the CPU pool."""
     async def cleanup_loop():
         while True:
             await asyncio.sleep(300)  # every 5 minutes
@@ -84,6 +99,14 @@ async def lifespan(app: FastAPI):
             repo_fetch_limiter.cleanup()
             await cleanup_expired_memories()
 
+    log_listener.start()
+    logging.root.handlers = [QueueHandler(_log_queue)]
+    # CPU-heavy work (chunking) runs here so it doesn't stall other WebSocket connections.
+    # Workers start lazily from a to_thread worker while the log listener, aiosqlite and
+    # other threads are running, so fork() is unsafe; forkserver children start clean.
+    app.state.cpu_pool = ProcessPoolExecutor(
+        max_workers=CPU_POOL_WORKERS, mp_context=multiprocessing.get_context("forkserver"),
+    )
     await init_db()
     try:
         ensure_index_exists()
@@ -92,6 +115,13 @@ async def lifespan(app: FastAPI):
     task = asyncio.create_task(cleanup_loop())
     yield
     task.cancel()
+    await close_github_session()
+    await close_ingest_session()
+    await close_reranker_session()
+    await close_db()
+    app.state.cpu_pool.shutdown(cancel_futures=True)
+    logging.root.handlers = [handler]
+    log_listener.stop()
 
 
 app = FastAPI(
@@ -124,7 +154,7 @@ class StructuredFormatter(logging.Formatter):
         }
         if hasattr(record, "extra_fields"):
             log_entry.update(record.extra_fields)
-        return json.dumps(log_entry)
+        return orjson.dumps(log_entry).decode()
 
 
 def structured_log(level: int, event: str, **kwargs: Any) -> None:
@@ -137,8 +167,13 @@ def structured_log(level: int, event: str, **kwargs: Any) -> None:
     logging.getLogger().handle(record)
 
 
+# Request paths only enqueue records; formatting and stderr writes happen on the listener thread.
+# The QueueHandler is only installed while the listener runs (see lifespan), so records logged
+# before startup or after shutdown still reach stderr instead of sitting in an undrained queue.
 handler = logging.StreamHandler()
 handler.setFormatter(StructuredFormatter())
+_log_queue: queue.Queue[logging.LogRecord] = queue.Queue(-1)
+log_listener = QueueListener(_log_queue, handler, respect_handler_level=True)
 logging.root.handlers = [handler]
 logging.root.setLevel(logging.INFO)
 
@@ -147,11 +182,20 @@ logging.root.setLevel(logging.INFO)
 
 
 def get_client_ip(request: Request) -> str:
-    """Extract client IP from request, respecting X-Forwarded-For behind a proxy."""
+    """Extract client IP from request, respecting X-Forwarded-For behind a proxy.
+
+    The result is memoized on request.state so repeated calls within a request are free.
+    """
+    cached = getattr(request.state, "client_ip", None)
+    if cached is not None:
+        return cached
     forwarded = request.headers.get("x-forwarded-for")
     if forwarded:
-        return forwarded.split(",")[0].strip()
-    return request.client.host if request.client else "unknown"
+        ip = forwarded.split(",")[0].strip()
+    else:
+        ip = request.client.host if request.client else "unknown"
+    request.state.client_ip = ip
+    return ip
 
 
 @app.get("/auth/github")
@@ -342,15 +386,10 @@ async def get_messages(
     except Exception as e:
         logging.warning(f"Auth failed for messages endpoint: {e}")
         return JSONResponse(status_code=401, content={"error": "Unauthorized"})
-    from src.utils.db import get_conversation_messages, get_all_repo_messages, DATABASE_PATH
-    import aiosqlite
+    from src.utils.db import get_conversation_info, get_conversation_messages, get_all_repo_messages
 
     # Try specific conversation first
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        cursor = await db.execute(
-            "SELECT github_login, owner, repo FROM conversations WHERE id = ?", (conv_id,)
-        )
-        row = await cursor.fetchone()
+    row = await get_conversation_info(conv_id)
 
     if row:
         db_login = row[0] or ""
@@ -394,6 +433,10 @@ async def clear_memory(request: Request) -> JSONResponse:
 # ── Helpers ──────────────────────────────────────────────────────────────────
 
 
+_MODE_RE = re.compile(r"^\[MODE:(\w+)\]\s*")
+_SUGGESTION_RE = re.compile(r"^\d+\.\s*(.+)$")
+
+
 def extract_suggestions(response: str) -> tuple[str, list[str]]:
     """Split response on ---SUGGESTIONS--- marker and parse numbered questions."""
     parts = response.split("---SUGGESTIONS---")
@@ -403,7 +446,7 @@ def extract_suggestions(response: str) -> tuple[str, list[str]]:
     suggestion_lines = parts[1].strip().splitlines()
     suggestions = []
     for line in suggestion_lines:
-        match = re.match(r"^\d+\.\s*(.+)$", line.strip())
+        match = _SUGGESTION_RE.match(line.strip())
         if match:
             suggestions.append(match.group(1).strip())
     return clean, suggestions[:3]
@@ -412,9 +455,75 @@ def extract_suggestions(response: str) -> tuple[str, list[str]]:
 # ── Connection manager ───────────────────────────────────────────────────────
 
 
+def _load_chunk_documents(owner: str, repo: str, github_token: str | None = None) -> list[Document]:
+    """Read the chunk cache from disk into Documents. Blocking; call via asyncio.to_thread."""
+    cached_chunks = load_chunk_cache(owner, repo, github_token)
+    if not cached_chunks:
+        return []
+    return [
+        Document(page_content=c["page_content"], metadata=c["metadata"])
+        for c in cached_chunks
+    ]
+
+
 class ConnectionManager:
     def __init__(self) -> None:
-        self.active_connections: dict[str, dict[str, Any]] = {}
+        # Ordered least- to most-recently active so the oldest can be evicted at capacity
+        self.active_connections: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        # Parsed chunk Documents per repo, LRU-bounded so BM25 never re-reads the chunk cache
+        self._doc_cache: OrderedDict[tuple[str, str], list[Document]] = OrderedDict()
+        # One lock per namespace so concurrent first-touch connects don't ingest twice, with the
+        # number of connects holding or waiting on it; entries are dropped when that reaches zero
+        self._ingest_locks: dict[str, tuple[asyncio.Lock, int]] = {}
+        # Strong refs to in-flight status sends so they aren't garbage-collected mid-write
+        self._status_tasks: set[asyncio.Task] = set()
+
+    @asynccontextmanager
+    async def _ingest_lock(self, key: str) -> AsyncIterator[None]:
+        """Hold the per-repo ingest lock, removing it once no connect() needs it."""
+        lock, users = self._ingest_locks.get(key) or (asyncio.Lock(), 0)
+        self._ingest_locks[key] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self._ingest_locks[key]
+            if users == 1:
+                del self._ingest_locks[key]
+            else:
+                self._ingest_locks[key] = (lock, users - 1)
+
+    def _send_status(self, websocket: WebSocket, status: str) -> None:
+        """Send a status frame without making the caller wait on the socket write."""
+        task = asyncio.create_task(websocket.send_text(f"status:{status}"))
+        self._status_tasks.add(task)
+        task.add_done_callback(self._on_status_sent)
+
+    def _on_status_sent(self, task: asyncio.Task) -> None:
+        self._status_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logging.debug(f"Status frame send failed: {task.exception()}")
+
+    async def _cache_documents(self, owner: str, repo: str, documents: list[Document]) -> None:
+        key = (owner, repo)
+        self._doc_cache[key] = documents
+        self._doc_cache.move_to_end(key)
+        while len(self._doc_cache) > MAX_CACHED_REPO_DOCUMENTS:
+            self._doc_cache.popitem(last=False)
+        if documents:
+            # Warm the BM25 index so the first query doesn't build it; off the loop, as it's CPU-bound
+            await asyncio.to_thread(get_bm25_index, documents)
+
+    async def _get_documents(self, owner: str, repo: str, github_token: str | None = None) -> list[Document]:
+        """Return the repo's chunk Documents, loading them from the chunk cache only on a miss."""
+        key = (owner, repo)
+        if key in self._doc_cache:
+            self._doc_cache.move_to_end(key)
+            return self._doc_cache[key]
+        documents = await asyncio.to_thread(_load_chunk_documents, owner, repo, github_token)
+        if documents:
+            await self._cache_documents(owner, repo, documents)
+        return documents
 
     async def connect(
         self, websocket: WebSocket, client_id: str, owner: str, repo: str,
@@ -423,11 +532,22 @@ class ConnectionManager:
     ) -> None:
         await websocket.accept()
 
-        # Cap concurrent connections to prevent memory exhaustion
+        # Cap concurrent connections to prevent memory exhaustion. The least recently active one
+        # makes room only if it has gone idle; otherwise the newcomer is turned away as before.
+        # Either way the dropped side gets a terminal frame, so its client won't auto-reconnect
+        # and push someone else out in turn.
         if len(self.active_connections) >= MAX_CONCURRENT_CONNECTIONS and client_id not in self.active_connections:
-            await websocket.send_text("error:server_busy")
-            await websocket.close()
-            return
+            oldest_id, oldest = next(iter(self.active_connections.items()))
+            if time.monotonic() - oldest["last_active"] < CONNECTION_IDLE_EVICT_SECONDS:
+                await websocket.send_text("error:server_busy")
+                await websocket.close()
+                return
+            structured_log(logging.INFO, "connection_evicted", client_id=oldest_id)
+            try:
+                await oldest["websocket"].send_text("error:server_busy")
+            except Exception:
+                pass
+            await self.disconnect(oldest_id)
 
         if client_id in self.active_connections:
             try:
@@ -439,98 +559,116 @@ class ConnectionManager:
         repo_url = f"https://github.com/{owner}/{repo}"
         logging.info(f"Processing repo: {repo_url}...")
 
-        # Try to load from cache first
-        cached = load_repo_cache(owner, repo, github_token)
-        metadata: dict = {}
-        if cached:
-            summary, tree, content = (
-                cached["summary"],
-                cached["tree"],
-                cached["content"],
-            )
-            metadata = cached.get("metadata", {})
-            source = "cache"
-        else:
-            try:
-                await websocket.send_text("status:cloning")
-                summary, tree, content = await ingest_repo(repo_url, github_token)
-                source = "fresh"
+        # Serialize cold loads of the same repo: a second client waits here, then finds the
+        # cache warm and skips the duplicate ingest + Pinecone writes
+        async with self._ingest_lock(f"{owner}/{repo}"):
+            # Try to load from cache first
+            cached = load_repo_cache(owner, repo, github_token)
+            metadata: dict = {}
+            if cached:
+                summary, tree, content = (
+                    cached["summary"],
+                    cached["tree"],
+                    cached["content"],
+                )
+                metadata = cached.get("metadata", {})
+                cached_at = cached.get("cached_at")
+                source = "cache"
+            else:
+                try:
+                    await websocket.send_text("status:cloning")
+                    summary, tree, content = await ingest_repo(repo_url, github_token)
+                    source = "fresh"
+                    metadata = await fetch_repo_metadata(repo_url, github_token)
+                    cached_at = time.time()
+                    save_repo_cache(
+                        owner, repo, summary, tree, content, github_token,
+                        metadata=metadata, cached_at=cached_at,
+                    )
+                except ValueError as e:
+                    error_msg = str(e)
+                    structured_log(logging.WARNING, "repo_ingest_failed",
+                        owner=owner, repo=repo, error=error_msg)
+                    if error_msg in (
+                        "error:repo_too_large",
+                        "error:repo_not_found",
+                        "error:repo_private",
+                        "error:repo_not_installed",
+                    ):
+                        await websocket.send_text(error_msg)
+                    else:
+                        await websocket.send_text("error:repo_not_found")
+                    await websocket.close()
+                    return
+                except Exception as e:
+                    structured_log(logging.ERROR, "repo_ingest_crash",
+                        owner=owner, repo=repo, detail=str(e))
+                    await websocket.send_text("error:unexpected")
+                    await websocket.close()
+                    return
+
+            # If cache didn't have metadata, fetch it now
+            if not metadata:
                 metadata = await fetch_repo_metadata(repo_url, github_token)
-                save_repo_cache(owner, repo, summary, tree, content, github_token, metadata=metadata)
-            except ValueError as e:
-                error_msg = str(e)
-                structured_log(logging.WARNING, "repo_ingest_failed",
-                    owner=owner, repo=repo, error=error_msg)
-                if error_msg in (
-                    "error:repo_too_large",
-                    "error:repo_not_found",
-                    "error:repo_private",
-                    "error:repo_not_installed",
-                ):
-                    await websocket.send_text(error_msg)
-                else:
-                    await websocket.send_text("error:repo_not_found")
-                await websocket.close()
-                return
-            except Exception as e:
-                structured_log(logging.ERROR, "repo_ingest_crash",
-                    owner=owner, repo=repo, detail=str(e))
-                await websocket.send_text("error:unexpected")
-                await websocket.close()
-                return
 
-        # If cache didn't have metadata, fetch it now
-        if not metadata:
-            metadata = await fetch_repo_metadata(repo_url, github_token)
+            request_id = uuid4().hex[:8]
+            namespace = f"{owner}/{repo}"
+            structured_log(logging.INFO, "repo_loaded",
+                request_id=request_id, owner=owner, repo=repo, source=source)
 
-        request_id = uuid4().hex[:8]
-        namespace = f"{owner}/{repo}"
-        structured_log(logging.INFO, "repo_loaded",
-            request_id=request_id, owner=owner, repo=repo, source=source)
-
-        # Index into Pinecone if not already done
-        already_indexed = is_repo_indexed(owner, repo, github_token) and check_namespace_exists(namespace)
-        if not already_indexed:
-            structured_log(logging.INFO, "indexing_start",
-                request_id=request_id, namespace=namespace)
-            try:
-                # Try chunk cache first
-                cached_chunks = load_chunk_cache(owner, repo, github_token)
-                if cached_chunks:
-                    from langchain_core.documents import Document as Doc
-                    documents = [
-                        Doc(page_content=c["page_content"], metadata=c["metadata"])
-                        for c in cached_chunks
-                    ]
-                    structured_log(logging.INFO, "chunks_loaded_from_cache",
-                        request_id=request_id, namespace=namespace,
-                        chunk_count=len(documents))
-                else:
-                    await websocket.send_text("status:chunking")
-                    documents = chunk_repo(content, namespace)
-                    save_chunk_cache(owner, repo, [
-                        {"page_content": d.page_content, "metadata": d.metadata}
-                        for d in documents
-                    ], github_token)
-
-                await websocket.send_text("status:indexing")
-                index_repo(namespace, documents)
-                del documents  # Free memory immediately after indexing
-                # Update cache with indexing status
-                save_repo_cache(
-                    owner, repo, summary, tree, content, github_token,
-                    metadata=metadata,
-                    pinecone_indexed=True,
-                    pinecone_indexed_at=time.time(),
-                )
-                structured_log(logging.INFO, "indexing_complete",
+            # Index into Pinecone if not already done
+            already_indexed = is_repo_indexed(owner, repo, github_token) and check_namespace_exists(namespace)
+            if not already_indexed:
+                structured_log(logging.INFO, "indexing_start",
                     request_id=request_id, namespace=namespace)
-            except Exception as e:
-                structured_log(logging.ERROR, "indexing_error",
-                    request_id=request_id, namespace=namespace, detail=str(e))
-                await websocket.send_text("error:indexing_failed")
-                await websocket.close()
-                return
+                try:
+                    # Try chunk cache first
+                    documents = await asyncio.to_thread(
+                        _load_chunk_documents, owner, repo, github_token,
+                    )
+                    if documents:
+                        structured_log(logging.INFO, "chunks_loaded_from_cache",
+                            request_id=request_id, namespace=namespace,
+                            chunk_count=len(documents))
+                    else:
+                        await websocket.send_text("status:chunking")
+                        # Parse in a thread; chunk_repo fans the per-file splitting out to the pool
+                        documents = await asyncio.to_thread(
+                            chunk_repo, content, namespace, app.state.cpu_pool,
+                        )
+                        save_chunk_cache(owner, repo, [
+                            {"page_content": d.page_content, "metadata": d.metadata}
+                            for d in documents
+                        ], github_token)
+
+                    await websocket.send_text("status:indexing")
+                    await aindex_repo(namespace, documents)
+                    # Keep the parsed chunks around for BM25 instead of re-reading them per message
+                    await self._cache_documents(owner, repo, documents)
+                    del documents
+                    # Update cache with indexing status
+                    save_repo_cache(
+                        owner, repo, summary, tree, None, github_token,  # Content file unchanged
+                        metadata=metadata,
+                        pinecone_indexed=True,
+                        pinecone_indexed_at=time.time(),
+                        cached_at=cached_at,  # Index status only; keep chunk cache fresh
+                    )
+                    structured_log(logging.INFO, "indexing_complete",
+                        request_id=request_id, namespace=namespace)
+                except Exception as e:
+                    structured_log(logging.ERROR, "indexing_error",
+                        request_id=request_id, namespace=namespace, detail=str(e))
+                    await websocket.send_text("error:indexing_failed")
+                    await websocket.close()
+                    return
+            else:
+                # Load the BM25 corpus now so the session's first message doesn't pay for it
+                await self._get_documents(owner, repo, github_token)
+
+        # The raw repo text (potentially tens of MB, or a mapping of it) is no longer needed once
+        # it's indexed and cached on disk — drop it now rather than holding it through the handshake
+        del cached, content
 
         # Upsert user if authenticated
         if github_login:
@@ -552,7 +690,7 @@ class ConnectionManager:
 
         self.active_connections[client_id] = {
             "websocket": websocket,
-            "history": restored_history if restored_history else [],
+            "history": deque(restored_history or [], maxlen=MAX_HISTORY_LENGTH),
             "owner": owner,
             "repo": repo,
             "summary": summary,
@@ -562,13 +700,14 @@ class ConnectionManager:
             "github_token": github_token,
             "github_login": github_login,
             "long_term_context": long_term_context,
+            "last_active": time.monotonic(),
         }
 
         await save_conversation(client_id, owner, repo, github_login=github_login)
 
         # Send metadata before confirmation
         if metadata:
-            await websocket.send_text(f"metadata:{json.dumps(metadata)}")
+            await websocket.send_text(f"metadata:{orjson.dumps(metadata).decode()}")
 
         # Send confirmation that repo is processed
         await websocket.send_text("repo_processed")
@@ -577,7 +716,7 @@ class ConnectionManager:
         try:
             initial_suggestions = await generate_initial_suggestions(summary, tree)
             if initial_suggestions:
-                await websocket.send_text(f"suggestions:{json.dumps(initial_suggestions)}")
+                await websocket.send_text(f"suggestions:{orjson.dumps(initial_suggestions).decode()}")
         except Exception as e:
             structured_log(logging.WARNING, "initial_suggestions_failed",
                 request_id=request_id, detail=str(e))
@@ -612,6 +751,8 @@ class ConnectionManager:
             return
 
         conn = self.active_connections[client_id]
+        self.active_connections.move_to_end(client_id)
+        conn["last_active"] = time.monotonic()
         ws = conn["websocket"]
         rid = conn.get("request_id", "unknown")
 
@@ -620,11 +761,11 @@ class ConnectionManager:
         tree = conn["tree"]
         summary = conn.get("summary", "")
         namespace = conn["namespace"]
-        history = conn["history"]
+        history = list(conn["history"])
 
         # Parse [MODE:xxx] prefix
         mode: str | None = None
-        mode_match = re.match(r"^\[MODE:(\w+)\]\s*", raw_query)
+        mode_match = _MODE_RE.match(raw_query)
         if mode_match:
             mode = mode_match.group(1).lower()
             query = raw_query[mode_match.end():]
@@ -636,21 +777,10 @@ class ConnectionManager:
             mode=mode or "default")
 
         # RAG: classify → enrich → augment → hybrid retrieve → rerank → cap → prompt
-        await ws.send_text("status:searching")
-
-        # Load chunks from disk for BM25 (not kept in memory to save RAM)
-        owner = conn["owner"]
-        repo = conn["repo"]
-        github_token = conn.get("github_token")
-        cached_chunks = load_chunk_cache(owner, repo, github_token)
-        if cached_chunks:
-            from langchain_core.documents import Document as Doc
-            all_documents = [
-                Doc(page_content=c["page_content"], metadata=c["metadata"])
-                for c in cached_chunks
-            ]
-        else:
-            all_documents = []
+        self._send_status(ws, "searching")
+
+        # Chunks for BM25 come from the in-memory LRU; disk is only hit on a miss
+        all_documents = await self._get_documents(conn["owner"], conn["repo"], conn.get("github_token"))
 
         retrieval_config = get_retrieval_config(query)
         top_k = retrieval_config["top_k"]
@@ -658,10 +788,14 @@ class ConnectionManager:
 
         retrieval_query = enrich_query_with_history(query, history)
         retrieval_query = augment_query_for_mode(retrieval_query, mode)
+        query_tokens = tokenize(retrieval_query)
 
         try:
-            vector_results = await query_similar(namespace, retrieval_query, top_k=top_k)
-            bm25_results = bm25_search(retrieval_query, all_documents, top_k=top_k)
+            # Vector search is network-bound, BM25 is CPU-bound — run them side by side
+            vector_results, bm25_results = await asyncio.gather(
+                query_similar(namespace, retrieval_query, top_k=top_k),
+                asyncio.to_thread(bm25_search, query_tokens, all_documents, top_k),
+            )
             merged = reciprocal_rank_fusion(vector_results, bm25_results, top_n=top_k)
 
             reranked = await rerank(query, merged, top_n=rerank_top_n)
@@ -672,57 +806,93 @@ class ConnectionManager:
             await ws.send_text("error:retrieval_failed")
             return
 
-        await ws.send_text("status:thinking")
-
         # Cap prompt history to last 10 turns to prevent context window overflow
         prompt_history = history[-10:]
-        prompt = await generate_prompt(
+
+        # Same question over the same chunks and conversation: replay the stored answer
+        cache_key = response_cache_key(
+            namespace, query, mode, reranked, prompt_history, conn.get("long_term_context"),
+        )
+        cached = get_response(cache_key)
+        if cached is not None:
+            clean_response, suggestions = cached
+            await ws.send_text("stream:chunk:" + clean_response)
+            await ws.send_text("stream:end")
+            structured_log(logging.INFO, "query_response",
+                request_id=rid, duration_ms=0, cache_hit=True,
+                response_length=len(clean_response))
+            if suggestions:
+                await ws.send_text(f"suggestions:{orjson.dumps(suggestions).decode()}")
+            conn["history"].append((query, clean_response))
+            await save_messages(client_id, [("user", query), ("assistant", clean_response)])
+            return
+
+        self._send_status(ws, "thinking")
+
+        prompt = generate_prompt(
             query, prompt_history, tree, reranked, summary=summary, mode=mode,
             long_term_context=conn.get("long_term_context"),
         )
         try:
             start = time.monotonic()
-            full_response = ""
+            response_parts: list[str] = []
             MARKER = "---SUGGESTIONS---"
-            buffer = ""  # Buffer to catch marker split across chunks
+            tail = ""  # Last len(MARKER)-1 chars, held back to catch a marker split across chunks
 
             marker_found = False
+            pending: list[str] = []  # Safe text not yet sent to the client
+            pending_len = 0
+            last_flush = time.monotonic()
+
+            async def flush_pending() -> None:
+                nonlocal pending_len, last_flush
+                if pending:
+                    await ws.send_text("stream:chunk:" + "".join(pending))
+                    pending.clear()
+                    pending_len = 0
+                last_flush = time.monotonic()
 
             async for chunk in generate_response_stream(prompt):
                 if marker_found:
                     # After marker: keep collecting for suggestions, don't stream to client
-                    full_response += chunk
+                    response_parts.append(chunk)
                     continue
 
-                buffer += chunk
-
-                # Check if marker is fully present in buffer
-                if MARKER in buffer:
-                    before, after = buffer.split(MARKER, 1)
-                    full_response += before + MARKER + after
-                    if before:
-                        await ws.send_text(f"stream:chunk:{before}")
+                buf = tail + chunk
+                idx = buf.find(MARKER)
+                if idx != -1:
+                    if idx:
+                        pending.append(buf[:idx])
+                    await flush_pending()
+                    response_parts.append(buf)
+                    tail = ""
                     marker_found = True
                     continue
 
                 # Only stream content we're sure doesn't contain the start of the marker
-                # Keep last len(MARKER)-1 chars in buffer to catch split markers
-                safe_len = len(buffer) - len(MARKER) + 1
+                safe_len = len(buf) - len(MARKER) + 1
                 if safe_len > 0:
-                    safe = buffer[:safe_len]
-                    buffer = buffer[safe_len:]
-                    full_response += safe
-                    await ws.send_text(f"stream:chunk:{safe}")
+                    response_parts.append(buf[:safe_len])
+                    pending.append(buf[:safe_len])
+                    pending_len += safe_len
+                    tail = buf[safe_len:]
+                else:
+                    tail = buf
+
+                if (pending_len >= STREAM_FLUSH_CHARS
+                        or time.monotonic() - last_flush >= STREAM_FLUSH_INTERVAL_SECONDS):
+                    await flush_pending()
 
-            # If loop ended without finding marker, flush remaining buffer
-            if not marker_found and buffer:
-                full_response += buffer
-                await ws.send_text(f"stream:chunk:{buffer}")
+            # If loop ended without finding marker, flush remaining tail
+            if tail:
+                response_parts.append(tail)
+                pending.append(tail)
+            await flush_pending()
 
             await ws.send_text("stream:end")
 
             duration_ms = round((time.monotonic() - start) * 1000)
-            clean_response, suggestions = extract_suggestions(full_response)
+            clean_response, suggestions = extract_suggestions("".join(response_parts))
 
             structured_log(logging.INFO, "query_response",
                 request_id=rid, duration_ms=duration_ms,
@@ -730,16 +900,16 @@ class ConnectionManager:
                 response_length=len(clean_response))
 
             if suggestions:
-                await ws.send_text(f"suggestions:{json.dumps(suggestions)}")
+                await ws.send_text(f"suggestions:{orjson.dumps(suggestions).decode()}")
+
+            if clean_response:
+                save_response(cache_key, clean_response, suggestions)
 
-            # Keep history bounded
+            # Bounded by the deque's maxlen
             conn["history"].append((query, clean_response))
-            if len(conn["history"]) > MAX_HISTORY_LENGTH:
-                conn["history"] = conn["history"][-MAX_HISTORY_LENGTH:]
 
             # Persist to SQLite
-            await save_message(client_id, "user", query)
-            await save_message(client_id, "assistant", clean_response)
+            await save_messages(client_id, [("user", query), ("assistant", clean_response)])
 
         except TimeoutError:
             structured_log(logging.ERROR, "query_error",
@@ -1,4 +1,6 @@
 import os
+import math
+import asyncio
 import aiohttp
 import logging
 
@@ -8,26 +10,77 @@ GITHUB_CLIENT_SECRET = os.getenv("GITHUB_CLIENT_SECRET", "")
 GITHUB_REDIRECT_URI = os.getenv("GITHUB_REDIRECT_URI", "")
 GITHUB_APP_SLUG = os.getenv("GITHUB_APP_SLUG", "")
 
+# Shared HTTP session so GitHub calls reuse pooled keep-alive connections
+_session: aiohttp.ClientSession | None = None
+
+
+def _get_session() -> aiohttp.ClientSession:
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=50, keepalive_timeout=75),
+        )
+    return _session
+
+
+async def close_session() -> None:
+    """Close the shared GitHub HTTP session. Called on app shutdown."""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
 
 async def exchange_code_for_token(code: str) -> str:
     """Exchange a GitHub OAuth code for an access token."""
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-            "https://github.com/login/oauth/access_token",
-            json={
-                "client_id": GITHUB_CLIENT_ID,
-                "client_secret": GITHUB_CLIENT_SECRET,
-                "code": code,
-            },
-            headers={"Accept": "application/json"},
-            timeout=aiohttp.ClientTimeout(total=10),
-        ) as response:
-            data = await response.json()
-            if "access_token" not in data:
-                error = data.get("error_description", "Unknown error")
-                logging.error(f"GitHub OAuth error: {error}")
-                raise ValueError(f"Failed to exchange code: {error}")
-            return data["access_token"]
+    async with _get_session().post(
+        "https://github.com/login/oauth/access_token",
+        json={
+            "client_id": GITHUB_CLIENT_ID,
+            "client_secret": GITHUB_CLIENT_SECRET,
+            "code": code,
+        },
+        headers={"Accept": "application/json"},
+        timeout=aiohttp.ClientTimeout(total=10),
+    ) as response:
+        data = await response.json()
+        if "access_token" not in data:
+            error = data.get("error_description", "Unknown error")
+            logging.error(f"GitHub OAuth error: {error}")
+            raise ValueError(f"Failed to exchange code: {error}")
+        return data["access_token"]
+
+
+REPOS_PER_PAGE = 50
+# Repo pages in flight at once per installation; every page is still fetched
+REPO_PAGE_CONCURRENCY = 8
+
+
+def _format_repo(r: dict) -> dict:
+    return {
+        "name": r["name"],
+        "owner": r["owner"]["login"],
+        "full_name": r["full_name"],
+        "description": r.get("description") or "",
+        "private": r["private"],
+        "language": r.get("language") or "",
+        "stargazers_count": r.get("stargazers_count", 0),
+        "updated_at": r.get("updated_at", ""),
+    }
+
+
+async def _fetch_installation_repos_page(
+    installation_id: int, page: int, headers: dict[str, str], timeout: aiohttp.ClientTimeout,
+) -> dict | None:
+    """Fetch one page of an installation's repositories. Returns None on a non-200 response."""
+    async with _get_session().get(
+        f"https://api.github.com/user/installations/{installation_id}/repositories?per_page={REPOS_PER_PAGE}&page={page}",
+        headers=headers,
+        timeout=timeout,
+    ) as response:
+        if response.status != 200:
+            return None
+        return await response.json()
 
 
 async def get_user_repos(token: str) -> dict:
@@ -40,88 +93,72 @@ async def get_user_repos(token: str) -> dict:
     repos: list[dict] = []
     installation_id: int | None = None
 
-    async with aiohttp.ClientSession() as session:
-        # Get the installation ID for our app
-        async with session.get(
-            "https://api.github.com/user/installations",
-            headers=headers,
-            timeout=timeout,
-        ) as response:
-            if response.status != 200:
-                return {"repos": [], "installation_id": None}
-            data = await response.json()
-            installations = data.get("installations", [])
-            if not installations:
-                return {"repos": [], "installation_id": None}
-
-        # Fetch repos from each installation (usually just one)
-        for installation in installations:
-            installation_id = installation["id"]
-            page = 1
-            while True:
-                async with session.get(
-                    f"https://api.github.com/user/installations/{installation_id}/repositories?per_page=50&page={page}",
-                    headers=headers,
-                    timeout=timeout,
-                ) as response:
-                    if response.status != 200:
-                        break
-                    data = await response.json()
-                    page_repos = data.get("repositories", [])
-                    if not page_repos:
-                        break
-                    for r in page_repos:
-                        repos.append({
-                            "name": r["name"],
-                            "owner": r["owner"]["login"],
-                            "full_name": r["full_name"],
-                            "description": r.get("description") or "",
-                            "private": r["private"],
-                            "language": r.get("language") or "",
-                            "stargazers_count": r.get("stargazers_count", 0),
-                            "updated_at": r.get("updated_at", ""),
-                        })
-                    if len(page_repos) < 50:
-                        break
-                    page += 1
+    session = _get_session()
+    # Get the installation ID for our app
+    async with session.get(
+        "https://api.github.com/user/installations",
+        headers=headers,
+        timeout=timeout,
+    ) as response:
+        if response.status != 200:
+            return {"repos": [], "installation_id": None}
+        data = await response.json()
+        installations = data.get("installations", [])
+        if not installations:
+            return {"repos": [], "installation_id": None}
+
+    # Fetch repos from each installation (usually just one)
+    for installation in installations:
+        inst_id: int = installation["id"]
+        installation_id = inst_id
+        # The first page tells us the total, then the remaining pages are fetched concurrently
+        first = await _fetch_installation_repos_page(inst_id, 1, headers, timeout)
+        if not first:
+            continue
+        total_count = first.get("total_count", 0)
+        last_page = math.ceil(total_count / REPOS_PER_PAGE)
+        sem = asyncio.Semaphore(REPO_PAGE_CONCURRENCY)
+
+        async def _fetch_page(page: int) -> dict | None:
+            async with sem:
+                return await _fetch_installation_repos_page(inst_id, page, headers, timeout)
+
+        rest = await asyncio.gather(*[_fetch_page(page) for page in range(2, last_page + 1)])
+        for data in [first, *rest]:
+            page_repos = data.get("repositories", []) if data else []
+            if not page_repos:
+                break
+            repos.extend(_format_repo(r) for r in page_repos)
 
     return {"repos": repos, "installation_id": installation_id}
 
 
 async def get_github_user(token: str) -> dict[str, str]:
     """Fetch the authenticated GitHub user's profile."""
-    async with aiohttp.ClientSession() as session:
-        async with session.get(
-            "https://api.github.com/user",
-            headers={
-                "Authorization": f"Bearer {token}",
-                "Accept": "application/vnd.github+json",
-            },
-            timeout=aiohttp.ClientTimeout(total=10),
-        ) as response:
-            if response.status != 200:
-                raise ValueError("Failed to fetch GitHub user")
-            data = await response.json()
-            return {
-                "login": data["login"],
-                "avatar_url": data["avatar_url"],
-            }
+    async with _get_session().get(
+        "https://api.github.com/user",
+        headers={
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/vnd.github+json",
+        },
+        timeout=aiohttp.ClientTimeout(total=10),
+    ) as response:
+        if response.status != 200:
+            raise ValueError("Failed to fetch GitHub user")
+        data = await response.json()
+        return {
+            "login": data["login"],
+            "avatar_url": data["avatar_url"],
+        }
 
 
 async def store_user_token(github_login: str, avatar_url: str, github_token: str) -> None:
     """Store the GitHub token hash in the users table for server-side use."""
     from src.utils.session import hash_token
-    from src.utils.db import upsert_user, DATABASE_PATH
-    import aiosqlite
+    from src.utils.db import upsert_user, set_user_token_hash
 
     await upsert_user(github_login, avatar_url)
-    token_hash = hash_token(github_token)
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        await db.execute(
-            "UPDATE users SET access_token_hash = ? WHERE github_login = ?",
-            (token_hash, github_login),
-        )
-        await db.commit()
+    await set_user_token_hash(github_login, hash_token(github_token))
 
 
 async def get_user_github_token_by_session(github_login: str, raw_token: str | None = None) -> str | None:
@@ -135,15 +172,9 @@ async def get_user_github_token_by_session(github_login: str, raw_token: str | N
     if not raw_token:
         return None
     from src.utils.session import hash_token
-    from src.utils.db import DATABASE_PATH
-    import aiosqlite
+    from src.utils.db import get_user_token_hash
     token_hash = hash_token(raw_token)
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        cursor = await db.execute(
-            "SELECT access_token_hash FROM users WHERE github_login = ?",
-            (github_login,),
-        )
-        row = await cursor.fetchone()
-    if row and row[0] == token_hash:
+    stored_hash = await get_user_token_hash(github_login)
+    if stored_hash == token_hash:
         return raw_token
     return raw_token  # Fallback: still allow even if hash doesn't match (migration period)
@@ -1,96 +1,217 @@
 import os
 import json
+import mmap
 import time
 import hashlib
 import logging
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Any
 
+import orjson
+
 CACHE_DIR = "/tmp/repo_cache"
 CHUNK_CACHE_DIR = "/tmp/repo_chunks"
 CACHE_TTL_SECONDS = 6 * 60 * 60  # 6 hours
 CACHE_MAX_FILES = 100
 
+os.makedirs(CACHE_DIR, exist_ok=True)
+os.makedirs(CHUNK_CACHE_DIR, exist_ok=True)
+
+# In-process LRU of repo cache file paths (path -> last use), least recently used first.
+# Maintained on every load/save here and reconciled with the cache directory before each
+# eviction sweep, since other workers (or an overlapping restart) write to it as well.
+_LRU_INDEX: OrderedDict[str, float] = OrderedDict()
+_LRU_LOCK = threading.Lock()
+
+
+def _sync_lru_index() -> None:
+    """Reconcile the LRU index with the cache files on disk. Caller must hold _LRU_LOCK.
+
+    Listing the directory is cheap; files are only stat'ed (for their atime) when they
+    were written or removed by another process since the last sync.
+    """
+    try:
+        on_disk = {os.path.join(CACHE_DIR, name) for name in os.listdir(CACHE_DIR) if name.endswith(".json")}
+    except FileNotFoundError:
+        on_disk = set()
+    if on_disk == _LRU_INDEX.keys():
+        return
+    entries = [(path, used) for path, used in _LRU_INDEX.items() if path in on_disk]
+    for path in on_disk.difference(_LRU_INDEX):
+        try:
+            entries.append((path, os.stat(path).st_atime))
+        except FileNotFoundError:
+            pass  # Evicted by another worker since the listing
+    _LRU_INDEX.clear()
+    _LRU_INDEX.update(sorted(entries, key=lambda x: x[1]))
+
+
+def _touch_lru(path: str) -> None:
+    """Mark a repo cache file as most recently used."""
+    with _LRU_LOCK:
+        _LRU_INDEX[path] = time.time()
+        _LRU_INDEX.move_to_end(path)
+
 
 def _enforce_lru_cache_limit():
     """Remove oldest cache files when exceeding the max file limit."""
-    try:
-        files = [
-            (f, os.path.getatime(os.path.join(CACHE_DIR, f)))
-            for f in os.listdir(CACHE_DIR)
-            if f.endswith(".json")
+    with _LRU_LOCK:
+        _sync_lru_index()
+        victims = [
+            _LRU_INDEX.popitem(last=False)[0]
+            for _ in range(len(_LRU_INDEX) - CACHE_MAX_FILES)
         ]
-        if len(files) > CACHE_MAX_FILES:
-            files.sort(key=lambda x: x[1])  # Oldest access time first
-            for f, _ in files[: len(files) - CACHE_MAX_FILES]:
-                os.remove(os.path.join(CACHE_DIR, f))
-    except OSError as e:
-        logging.warning(f"Error enforcing cache limit: {e}")
+    # Unlink outside the lock; one failure shouldn't abort the rest of the sweep
+    for path in victims:
+        for victim in (path, _meta_path(path), _content_path(path)):
+            try:
+                os.unlink(victim)
+            except FileNotFoundError:
+                pass  # Already evicted by another worker
+            except OSError as e:
+                logging.warning(f"Error evicting cache file {victim}: {e}")
+
+
+def _atomic_write(path: str, payload: bytes) -> None:
+    """Write to a temp file then rename, so readers never see a half-written cache file."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+@lru_cache(maxsize=256)
+def _token_hash(token: str) -> str:
+    """Short, stable digest of a GitHub token for use in cache file names."""
+    return hashlib.sha256(token.encode()).hexdigest()[:12]
+
+
+def _meta_path(cache_path: str) -> str:
+    """Sidecar holding just the small status fields of a repo cache file."""
+    return f"{cache_path}.meta"
+
+
+def _content_path(cache_path: str) -> str:
+    """Raw repo text lives beside the JSON so it can be mapped instead of parsed."""
+    return f"{cache_path}.content"
+
+
+def _map_content(path: str) -> mmap.mmap | bytes:
+    """Map a content file read-only; the mapping outlives the closed file handle."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""  # mmap can't map an empty file
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
 
 
 def get_cache_path(owner: str, repo: str, github_token: str | None = None) -> str:
-    os.makedirs(CACHE_DIR, exist_ok=True)
     if github_token:
-        token_hash = hashlib.sha256(github_token.encode()).hexdigest()[:12]
-        return os.path.join(CACHE_DIR, f"{owner}_{repo}_{token_hash}.json")
+        return os.path.join(CACHE_DIR, f"{owner}_{repo}_{_token_hash(github_token)}.json")
     return os.path.join(CACHE_DIR, f"{owner}_{repo}.json")
 
 
 def load_repo_cache(owner: str, repo: str, github_token: str | None = None) -> dict[str, Any] | None:
-    """Load a cached repo if it exists and hasn't expired."""
+    """Load a cached repo if it exists and hasn't expired.
+
+    `content` is returned as a read-only mmap of the raw UTF-8 text, not a str.
+    """
     path = get_cache_path(owner, repo, github_token)
     try:
         if os.path.exists(path):
-            os.utime(path, None)  # Update access time for LRU
-            with open(path, "r") as f:
-                data = json.load(f)
-                cached_at = data.get("cached_at", 0)
-                if time.time() - cached_at < CACHE_TTL_SECONDS:
-                    return data
+            with open(path, "rb") as f:
+                data = orjson.loads(f.read())
+            cached_at = data.get("cached_at", 0)
+            content_path = data.get("content_path")
+            if content_path and time.time() - cached_at < CACHE_TTL_SECONDS:
+                data["content"] = _map_content(content_path)
+                _touch_lru(path)
+                return data
     except (json.JSONDecodeError, OSError) as e:
         logging.warning(f"Error loading cache for {owner}/{repo}: {e}")
     return None
 
 
 def save_repo_cache(
-    owner: str, repo: str, summary: Any, tree: Any, content: Any,
+    owner: str, repo: str, summary: Any, tree: Any, content: str | None,
     github_token: str | None = None,
     metadata: dict[str, Any] | None = None,
     pinecone_indexed: bool = False,
     pinecone_indexed_at: float | None = None,
+    cached_at: float | None = None,
 ) -> None:
-    """Save repo data to cache."""
+    """Save repo data to cache.
+
+    `cached_at` is the ingest time; pass the original value when only updating index status.
+    The file's mtime is pinned to it so chunk-cache freshness can be checked with a stat.
+    `content` goes to its own file; pass None to keep the one already on disk.
+    """
     path = get_cache_path(owner, repo, github_token)
+    content_path = _content_path(path)
+    if cached_at is None:
+        cached_at = time.time()
     try:
+        if content is not None:
+            # Atomic replace leaves any live mmap of the old file intact
+            _atomic_write(content_path, content.encode())
         data = {
             "summary": summary,
             "tree": tree,
-            "content": content,
-            "cached_at": time.time(),
+            "content_path": content_path,
+            "cached_at": cached_at,
             "pinecone_indexed": pinecone_indexed,
             "pinecone_indexed_at": pinecone_indexed_at,
         }
         if metadata:
             data["metadata"] = metadata
-        with open(path, "w") as f:
-            json.dump(data, f)
+        _atomic_write(path, orjson.dumps(data))
+        os.utime(path, (time.time(), cached_at))
+        _atomic_write(_meta_path(path), orjson.dumps({
+            "cached_at": cached_at,
+            "pinecone_indexed": pinecone_indexed,
+            "pinecone_indexed_at": pinecone_indexed_at,
+        }))
+        _touch_lru(path)
         _enforce_lru_cache_limit()
     except OSError as e:
         logging.warning(f"Error saving cache for {owner}/{repo}: {e}")
 
 
+def load_repo_meta(owner: str, repo: str, github_token: str | None = None) -> dict[str, Any] | None:
+    """Load only the status fields of a cached repo (no content) if it hasn't expired."""
+    path = _meta_path(get_cache_path(owner, repo, github_token))
+    try:
+        with open(path, "rb") as f:
+            meta = orjson.loads(f.read())
+        if time.time() - meta.get("cached_at", 0) < CACHE_TTL_SECONDS:
+            return meta
+    except FileNotFoundError:
+        pass
+    except (json.JSONDecodeError, OSError) as e:
+        logging.warning(f"Error loading cache metadata for {owner}/{repo}: {e}")
+    return None
+
+
 def _get_chunk_cache_path(owner: str, repo: str, github_token: str | None = None) -> str:
-    os.makedirs(CHUNK_CACHE_DIR, exist_ok=True)
     if github_token:
-        token_hash = hashlib.sha256(github_token.encode()).hexdigest()[:12]
-        return os.path.join(CHUNK_CACHE_DIR, f"{owner}_{repo}_{token_hash}.json")
+        return os.path.join(CHUNK_CACHE_DIR, f"{owner}_{repo}_{_token_hash(github_token)}.json")
     return os.path.join(CHUNK_CACHE_DIR, f"{owner}_{repo}.json")
 
 
 def save_chunk_cache(
     owner: str, repo: str, documents: list[dict[str, Any]], github_token: str | None = None,
 ) -> None:
-    """Save chunked documents to local cache as JSON."""
+    """Save chunked documents to local cache as JSON (serialized with orjson)."""
     path = _get_chunk_cache_path(owner, repo, github_token)
+    repo_path = get_cache_path(owner, repo, github_token)
     try:
         data = {
             "chunks": [
@@ -98,9 +219,10 @@ def save_chunk_cache(
                 for doc in documents
             ],
             "cached_at": time.time(),
+            # Ingest time of the repo cache these chunks were built from
+            "repo_cached_at": os.path.getmtime(repo_path) if os.path.exists(repo_path) else 0,
         }
-        with open(path, "w") as f:
-            json.dump(data, f)
+        _atomic_write(path, orjson.dumps(data))
         logging.info(f"Saved {len(documents)} chunks to cache for {owner}/{repo}")
     except OSError as e:
         logging.warning(f"Error saving chunk cache for {owner}/{repo}: {e}")
@@ -115,15 +237,11 @@ def load_chunk_cache(
     try:
         if not os.path.exists(chunk_path):
             return None
-        with open(chunk_path, "r") as f:
-            data = json.load(f)
-        chunk_ts = data.get("cached_at", 0)
-        # Invalidate if repo cache is newer (fresh ingest happened)
+        with open(chunk_path, "rb") as f:
+            data = orjson.loads(f.read())
+        # Invalidate if repo cache is newer (fresh ingest happened); its mtime is its ingest time
         if os.path.exists(repo_path):
-            with open(repo_path, "r") as f:
-                repo_data = json.load(f)
-            repo_ts = repo_data.get("cached_at", 0)
-            if repo_ts > chunk_ts:
+            if os.path.getmtime(repo_path) > data.get("repo_cached_at", 0):
                 logging.info(f"Chunk cache stale for {owner}/{repo}, repo cache is newer")
                 return None
         chunks = data.get("chunks", [])
@@ -136,9 +254,9 @@ def load_chunk_cache(
 
 def is_repo_indexed(owner: str, repo: str, github_token: str | None = None) -> bool:
     """Check if the repo has been indexed to Pinecone within the cache TTL."""
-    cached = load_repo_cache(owner, repo, github_token)
-    if cached and cached.get("pinecone_indexed"):
-        indexed_at = cached.get("pinecone_indexed_at", 0)
+    meta = load_repo_meta(owner, repo, github_token)
+    if meta and meta.get("pinecone_indexed"):
+        indexed_at = meta.get("pinecone_indexed_at") or 0
         if time.time() - indexed_at < CACHE_TTL_SECONDS:
             return True
     return False
@@ -1,12 +1,22 @@
 import re
+import mmap
 import logging
-from pathlib import PurePosixPath
+from collections import deque
+from concurrent.futures import Executor, Future
+from itertools import chain, islice
+from typing import Any, Iterator
 
 from langchain_core.documents import Document
 from langchain_text_splitters import Language, RecursiveCharacterTextSplitter
 
 CHUNK_SIZE = 2500
 CHUNK_OVERLAP = 300
+# Below this many files, pickling to worker processes costs more than it saves
+PARALLEL_MIN_FILES = 50
+# Files per pool task, and tasks submitted ahead of the one being collected (about 2x the
+# pool size); together they bound how many decoded file texts are in flight at once
+PARALLEL_BATCH_FILES = 8
+PARALLEL_MAX_PENDING = 16
 
 BINARY_EXTENSIONS = frozenset({
     ".png", ".jpg", ".jpeg", ".gif", ".bmp", ".ico", ".svg", ".webp",
@@ -53,86 +63,183 @@ EXTENSION_TO_LANGUAGE: dict[str, Language] = {
 # ================================================
 # File: path/to/file.py
 # ================================================
+# Matched as bytes so it can run directly over an mmap of the cached content; the str twin
+# (ASCII \s, like the bytes one) parses a fresh ingest without encoding a copy of it first.
 _FILE_HEADER_RE = re.compile(
-    r"^={4,}\s*\nFile:\s*(.+?)\s*\n={4,}\s*$",
+    rb"^={4,}\s*\nFile:\s*(.+?)\s*\n={4,}\s*$",
     re.MULTILINE,
 )
+_FILE_HEADER_STR_RE = re.compile(_FILE_HEADER_RE.pattern.decode(), re.MULTILINE | re.ASCII)
+_WHITESPACE = frozenset(b" \t\n\r\f\v")
+_WHITESPACE_STR = frozenset(" \t\n\r\f\v")
+_EQUALS = ord("=")
 
 
-def parse_content_to_files(content: str) -> list[tuple[str, str]]:
-    """Parse gitingest monolithic content string into individual (path, text) pairs."""
-    splits = _FILE_HEADER_RE.split(content)
-    # splits alternates: [preamble, path1, body1, path2, body2, ...]
-    files: list[tuple[str, str]] = []
-    for i in range(1, len(splits) - 1, 2):
-        path = splits[i].strip()
-        body = splits[i + 1].strip()
+def _iter_file_headers(content: str | bytes | mmap.mmap) -> Iterator[re.Match]:
+    """Yield the same matches as _FILE_HEADER_RE.finditer, but much faster on large blobs.
+
+    Candidates are found with a literal find for "File:" (memchr speed), then the regex is
+    anchored at the start of the "====" line just before each one to confirm it.
+    """
+    if isinstance(content, str):
+        return _scan_headers(content, _FILE_HEADER_STR_RE, "File:", _WHITESPACE_STR, "=")
+    return _scan_headers(content, _FILE_HEADER_RE, b"File:", _WHITESPACE, _EQUALS)
+
+
+def _scan_headers(
+    content: Any, pattern: re.Pattern, needle: Any, whitespace: frozenset, equals: Any,
+) -> Iterator[re.Match]:
+    pos = 0
+    while (anchor := content.find(needle, pos)) != -1:
+        start = anchor
+        while start > pos and content[start - 1] in whitespace:
+            start -= 1
+        while start > pos and content[start - 1] == equals:
+            start -= 1
+        m = pattern.match(content, start)
+        if m:
+            yield m
+            pos = m.end()
+        else:
+            pos = anchor + len(needle)
+
+
+def _build_splitters() -> dict[Language | None, RecursiveCharacterTextSplitter]:
+    """Build one splitter per supported language (plus a plain-text default) up front."""
+    splitters: dict[Language | None, RecursiveCharacterTextSplitter] = {
+        None: RecursiveCharacterTextSplitter(
+            chunk_size=CHUNK_SIZE,
+            chunk_overlap=CHUNK_OVERLAP,
+        ),
+    }
+    for language in set(EXTENSION_TO_LANGUAGE.values()):
+        try:
+            splitters[language] = RecursiveCharacterTextSplitter.from_language(
+                language=language,
+                chunk_size=CHUNK_SIZE,
+                chunk_overlap=CHUNK_OVERLAP,
+            )
+        except Exception:
+            pass  # Unsupported by this langchain version; falls back to the default splitter
+    return splitters
+
+
+_SPLITTERS = _build_splitters()
+
+
+def parse_content_to_files(content: str | bytes | mmap.mmap) -> Iterator[tuple[str, str]]:
+    """Lazily parse gitingest monolithic content into individual (path, text) pairs.
+
+    Walks the headers and slices bodies out of the original buffer, so the whole split
+    list is never materialized. Bytes-like content (e.g. an mmap of the repo cache) is
+    scanned in place with only each file body decoded; a str is scanned as-is.
+    """
+    prev_path: str | None = None
+    prev_end = 0
+    for m in _iter_file_headers(content):
+        if prev_path is not None:
+            body = content[prev_end:m.start()].strip()
+            if body:
+                yield prev_path, _as_text(body)
+        prev_path = _as_text(m.group(1).strip())
+        prev_end = m.end()
+    if prev_path is not None:
+        body = content[prev_end:].strip()
         if body:
-            files.append((path, body))
-    return files
+            yield prev_path, _as_text(body)
+
+
+def _as_text(value: str | bytes) -> str:
+    return value if isinstance(value, str) else value.decode("utf-8", errors="replace")
+
 
+def _suffix(path: str) -> str:
+    """Lowercased extension of the last path component, matching PurePosixPath(path).suffix."""
+    stem, _, ext = path.rpartition("/")[2].rpartition(".")
+    return f".{ext.lower()}" if stem and ext else ""
 
-def _is_binary(path: str) -> bool:
-    return PurePosixPath(path).suffix.lower() in BINARY_EXTENSIONS
 
+def _is_binary(suffix: str) -> bool:
+    return suffix in BINARY_EXTENSIONS
 
-def _get_language(path: str) -> Language | None:
-    return EXTENSION_TO_LANGUAGE.get(PurePosixPath(path).suffix.lower())
 
+def _get_language(suffix: str) -> Language | None:
+    return EXTENSION_TO_LANGUAGE.get(suffix)
 
-def chunk_repo(content: str, namespace: str) -> list[Document]:
+
+def _chunk_one(path: str, text: str, namespace: str) -> list[dict]:
+    """Split a single file into chunk dicts (plain dicts pickle cheaper than Documents)."""
+    language = _get_language(_suffix(path))
+    splitter = _SPLITTERS.get(language, _SPLITTERS[None])
+    return [
+        {
+            "page_content": f"File: {path}\n\n{chunk_text}",
+            "metadata": {
+                "file_path": path,
+                "language": language.value if language else "text",
+                "chunk_index": idx,
+                "namespace": namespace,
+            },
+        }
+        for idx, chunk_text in enumerate(splitter.split_text(text))
+    ]
+
+
+def _chunk_batch(batch: list[tuple[str, str]], namespace: str) -> list[list[dict]]:
+    return [_chunk_one(path, text, namespace) for path, text in batch]
+
+
+def _map_bounded(executor: Executor, files: Iterator[tuple[str, str]], namespace: str) -> Iterator[list[dict]]:
+    """Chunk files on the pool in order, like executor.map, but without draining the input.
+
+    executor.map submits every item up front, so all file texts would sit in its queue at
+    once; here at most PARALLEL_MAX_PENDING batches are outstanding, refilled as they finish.
+    """
+    pending: deque[Future[list[list[dict]]]] = deque()
+    try:
+        for batch in iter(lambda: list(islice(files, PARALLEL_BATCH_FILES)), []):
+            pending.append(executor.submit(_chunk_batch, batch, namespace))
+            if len(pending) >= PARALLEL_MAX_PENDING:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def chunk_repo(content: str | bytes | mmap.mmap, namespace: str, executor: Executor | None = None) -> list[Document]:
     """Parse gitingest content into files, then chunk each file.
 
     Args:
-        content: The monolithic gitingest content string.
+        content: The monolithic gitingest content, as a string or bytes-like buffer.
         namespace: The repo namespace (owner/repo) for metadata.
+        executor: Optional process pool to split files in parallel; large repos only.
 
     Returns:
         List of LangChain Document objects with metadata.
     """
-    files = parse_content_to_files(content)
-    all_chunks: list[Document] = []
+    files = ((path, text) for path, text in parse_content_to_files(content) if not _is_binary(_suffix(path)))
+    # Peek far enough to decide whether the pool is worth it, without parsing everything up front
+    head = list(islice(files, PARALLEL_MIN_FILES))
 
-    for path, text in files:
-        if _is_binary(path):
-            continue
-
-        language = _get_language(path)
-
-        if language:
-            try:
-                splitter = RecursiveCharacterTextSplitter.from_language(
-                    language=language,
-                    chunk_size=CHUNK_SIZE,
-                    chunk_overlap=CHUNK_OVERLAP,
-                )
-            except Exception:
-                splitter = RecursiveCharacterTextSplitter(
-                    chunk_size=CHUNK_SIZE,
-                    chunk_overlap=CHUNK_OVERLAP,
-                )
-        else:
-            splitter = RecursiveCharacterTextSplitter(
-                chunk_size=CHUNK_SIZE,
-                chunk_overlap=CHUNK_OVERLAP,
-            )
+    results: Iterator[list[dict]]
+    if executor is not None and len(head) >= PARALLEL_MIN_FILES:
+        results = _map_bounded(executor, chain(head, files), namespace)
+    else:
+        results = (_chunk_one(path, text, namespace) for path, text in chain(head, files))
 
-        chunks = splitter.split_text(text)
-
-        for idx, chunk_text in enumerate(chunks):
-            doc = Document(
-                page_content=f"File: {path}\n\n{chunk_text}",
-                metadata={
-                    "file_path": path,
-                    "language": language.value if language else "text",
-                    "chunk_index": idx,
-                    "namespace": namespace,
-                },
-            )
-            all_chunks.append(doc)
+    file_count = 0
+    all_chunks: list[Document] = []
+    for file_chunks in results:
+        file_count += 1
+        all_chunks.extend(
+            Document(page_content=c["page_content"], metadata=c["metadata"])
+            for c in file_chunks
+        )
 
     logging.info(
-        f"Chunked {len(files)} files into {len(all_chunks)} chunks "
+        f"Chunked {file_count} files into {len(all_chunks)} chunks "
         f"for namespace '{namespace}'"
     )
     return all_chunks
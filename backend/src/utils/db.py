@@ -1,16 +1,49 @@
 import os
 import time
 import json
+import asyncio
 import aiosqlite
 import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 
 DATABASE_PATH = os.getenv("DATABASE_PATH", "data/gta.db")
 
+# One connection for the whole process, opened by init_db
+_DB: aiosqlite.Connection | None = None
+# Writes share that connection, so each transaction must finish before the next begins
+_WRITE_LOCK = asyncio.Lock()
+
+
+def _db() -> aiosqlite.Connection:
+    if _DB is None:
+        raise RuntimeError("Database not initialized; call init_db() first")
+    return _DB
+
+
+@asynccontextmanager
+async def _transaction() -> AsyncIterator[aiosqlite.Connection]:
+    """Run a group of writes as one transaction on the shared connection."""
+    async with _WRITE_LOCK:
+        db = _db()
+        try:
+            yield db
+            await db.commit()
+        except BaseException:
+            await db.rollback()
+            raise
+
 
 async def init_db() -> None:
-    """Create the data directory and database tables if they don't exist."""
+    """Open the shared connection and create the database tables if they don't exist."""
+    global _DB
     os.makedirs(os.path.dirname(DATABASE_PATH) or "data", exist_ok=True)
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    if _DB is None:
+        _DB = await aiosqlite.connect(DATABASE_PATH)
+        await _DB.execute("PRAGMA journal_mode=WAL")
+        await _DB.execute("PRAGMA synchronous=NORMAL")
+        await _DB.execute("PRAGMA temp_store=MEMORY")
+    async with _transaction() as db:
         await db.execute("""
             CREATE TABLE IF NOT EXISTS conversations (
                 id TEXT PRIMARY KEY,
@@ -86,7 +119,23 @@ async def init_db() -> None:
         await db.execute("CREATE INDEX IF NOT EXISTS idx_conversations_user_repo ON conversations(github_login, owner, repo)")
         await db.execute("CREATE INDEX IF NOT EXISTS idx_messages_convid ON messages(conversation_id, created_at)")
 
-        await db.commit()
+        # ── Triggers ──
+
+        # Keep conversations.updated_at in step with new messages, so writers only need the INSERT
+        await db.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_msg_updates_conv AFTER INSERT ON messages
+            BEGIN
+                UPDATE conversations SET updated_at = NEW.created_at WHERE id = NEW.conversation_id;
+            END
+        """)
+
+
+async def close_db() -> None:
+    """Close the shared connection on shutdown."""
+    global _DB
+    if _DB is not None:
+        await _DB.close()
+        _DB = None
 
 
 # ── Existing functions ──
@@ -95,7 +144,7 @@ async def init_db() -> None:
 async def save_conversation(conv_id: str, owner: str, repo: str, github_login: str | None = None) -> None:
     """Insert a new conversation row, ignoring if it already exists."""
     now = time.time()
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with _transaction() as db:
         await db.execute(
             "INSERT OR IGNORE INTO conversations (id, owner, repo, github_login, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
             (conv_id, owner, repo, github_login, now, now),
@@ -106,67 +155,84 @@ async def save_conversation(conv_id: str, owner: str, repo: str, github_login: s
                 "UPDATE conversations SET github_login = ? WHERE id = ? AND github_login IS NULL",
                 (github_login, conv_id),
             )
-        await db.commit()
 
 
 async def save_message(conv_id: str, role: str, content: str) -> None:
-    """Insert a message and update the conversation's updated_at timestamp."""
+    """Insert a message; trg_msg_updates_conv bumps the conversation's updated_at."""
     now = time.time()
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with _transaction() as db:
         await db.execute(
             "INSERT INTO messages (conversation_id, role, content, created_at) VALUES (?, ?, ?, ?)",
             (conv_id, role, content, now),
         )
-        await db.execute(
-            "UPDATE conversations SET updated_at = ? WHERE id = ?",
-            (now, conv_id),
+
+
+async def save_messages(conv_id: str, messages: list[tuple[str, str]]) -> None:
+    """Insert several (role, content) messages in a single transaction."""
+    now = time.time()
+    async with _transaction() as db:
+        await db.executemany(
+            "INSERT INTO messages (conversation_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+            [(conv_id, role, content, now) for role, content in messages],
         )
-        await db.commit()
 
 
 async def get_conversation_history(conv_id: str, limit: int = 20) -> list[tuple[str, str]]:
     """Return the most recent (query, response) pairs for a conversation."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        cursor = await db.execute(
-            "SELECT role, content FROM messages WHERE conversation_id = ? ORDER BY created_at ASC",
-            (conv_id,),
-        )
-        rows = await cursor.fetchall()
+    db = _db()
+    # Only fetch the tail (newest first via idx_messages_convid), with a little slack for unpaired rows
+    cursor = await db.execute(
+        "SELECT role, content FROM messages WHERE conversation_id = ? ORDER BY created_at DESC, id DESC LIMIT ?",
+        (conv_id, limit * 2 + 4),
+    )
+    rows = list(await cursor.fetchall())[::-1]
 
     # Pair consecutive user/assistant messages
     pairs: list[tuple[str, str]] = []
-    i = 0
-    while i < len(rows) - 1:
-        if rows[i][0] == "user" and rows[i + 1][0] == "assistant":
-            pairs.append((rows[i][1], rows[i + 1][1]))
-            i += 2
+    pending_query: str | None = None
+    for role, content in rows:
+        if role == "user":
+            pending_query = content
+        elif role == "assistant" and pending_query is not None:
+            pairs.append((pending_query, content))
+            pending_query = None
         else:
-            i += 1
+            pending_query = None
 
     return pairs[-limit:]
 
 
+async def get_conversation_info(conv_id: str) -> tuple[str | None, str, str] | None:
+    """Return (github_login, owner, repo) for a conversation, or None if it doesn't exist."""
+    db = _db()
+    cursor = await db.execute(
+        "SELECT github_login, owner, repo FROM conversations WHERE id = ?", (conv_id,)
+    )
+    row = await cursor.fetchone()
+    return (row[0], row[1], row[2]) if row else None
+
+
 async def get_conversation_messages(conv_id: str) -> list[tuple[str, str]]:
     """Return all (role, content) rows for a conversation, ordered by time."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        cursor = await db.execute(
-            "SELECT role, content FROM messages WHERE conversation_id = ? ORDER BY created_at ASC",
-            (conv_id,),
-        )
-        return await cursor.fetchall()
+    db = _db()
+    cursor = await db.execute(
+        "SELECT role, content FROM messages WHERE conversation_id = ? ORDER BY created_at ASC, id ASC",
+        (conv_id,),
+    )
+    return await cursor.fetchall()
 
 
 async def get_all_repo_messages(github_login: str, owner: str, repo: str, limit: int = 50) -> list[tuple[str, str]]:
     """Return all messages for a user+repo across all conversations, most recent first."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        cursor = await db.execute(
-            """SELECT m.role, m.content FROM messages m
-               JOIN conversations c ON c.id = m.conversation_id
-               WHERE c.github_login = ? AND c.owner = ? AND c.repo = ?
-               ORDER BY m.created_at ASC""",
-            (github_login, owner, repo),
-        )
-        rows = await cursor.fetchall()
+    db = _db()
+    cursor = await db.execute(
+        """SELECT m.role, m.content FROM messages m
+           JOIN conversations c ON c.id = m.conversation_id
+           WHERE c.github_login = ? AND c.owner = ? AND c.repo = ?
+           ORDER BY m.created_at ASC, m.id ASC""",
+        (github_login, owner, repo),
+    )
+    rows = await cursor.fetchall()
     # Return last `limit` messages
     return rows[-limit:] if len(rows) > limit else rows
 
@@ -177,7 +243,7 @@ async def get_all_repo_messages(github_login: str, owner: str, repo: str, limit:
 async def upsert_user(github_login: str, avatar_url: str) -> dict:
     """Create or update a user. Returns the user row as dict."""
     now = time.time()
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with _transaction() as db:
         await db.execute(
             """INSERT INTO users (github_login, avatar_url, created_at, last_seen_at)
                VALUES (?, ?, ?, ?)
@@ -186,7 +252,6 @@ async def upsert_user(github_login: str, avatar_url: str) -> dict:
                    last_seen_at = excluded.last_seen_at""",
             (github_login, avatar_url, now, now),
         )
-        await db.commit()
         cursor = await db.execute(
             "SELECT github_login, avatar_url, preferred_mode, settings_json, created_at, last_seen_at FROM users WHERE github_login = ?",
             (github_login,),
@@ -201,14 +266,34 @@ async def upsert_user(github_login: str, avatar_url: str) -> dict:
     return {"github_login": github_login}
 
 
+async def set_user_token_hash(github_login: str, token_hash: str) -> None:
+    """Store the hash of a user's GitHub token."""
+    async with _transaction() as db:
+        await db.execute(
+            "UPDATE users SET access_token_hash = ? WHERE github_login = ?",
+            (token_hash, github_login),
+        )
+
+
+async def get_user_token_hash(github_login: str) -> str | None:
+    """Return the stored GitHub token hash for a user, if any."""
+    db = _db()
+    cursor = await db.execute(
+        "SELECT access_token_hash FROM users WHERE github_login = ?",
+        (github_login,),
+    )
+    row = await cursor.fetchone()
+    return row[0] if row else None
+
+
 async def get_user_settings(github_login: str) -> dict:
     """Get user preferences and settings."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        cursor = await db.execute(
-            "SELECT preferred_mode, settings_json FROM users WHERE github_login = ?",
-            (github_login,),
-        )
-        row = await cursor.fetchone()
+    db = _db()
+    cursor = await db.execute(
+        "SELECT preferred_mode, settings_json FROM users WHERE github_login = ?",
+        (github_login,),
+    )
+    row = await cursor.fetchone()
     if row:
         settings = {}
         try:
@@ -221,7 +306,7 @@ async def get_user_settings(github_login: str) -> dict:
 
 async def update_user_settings(github_login: str, preferred_mode: str | None = None, settings_json: str | None = None) -> None:
     """Update user preferences."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with _transaction() as db:
         if preferred_mode is not None:
             await db.execute(
                 "UPDATE users SET preferred_mode = ? WHERE github_login = ?",
@@ -232,7 +317,6 @@ async def update_user_settings(github_login: str, preferred_mode: str | None = N
                 "UPDATE users SET settings_json = ? WHERE github_login = ?",
                 (settings_json, github_login),
             )
-        await db.commit()
 
 
 # ── Conversation summary functions ──
@@ -244,27 +328,26 @@ async def save_conversation_summary(
 ) -> None:
     """Store a conversation summary for long-term memory."""
     now = time.time()
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with _transaction() as db:
         await db.execute(
             """INSERT INTO conversation_summaries
                (conversation_id, github_login, owner, repo, summary, key_topics, message_count, created_at)
                VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
             (conv_id, github_login, owner, repo, summary, json.dumps(key_topics), message_count, now),
         )
-        await db.commit()
 
 
 async def get_conversation_summaries(github_login: str, owner: str, repo: str, limit: int = 3) -> list[dict]:
     """Get recent conversation summaries for a user+repo."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        cursor = await db.execute(
-            """SELECT conversation_id, summary, key_topics, message_count, created_at
-               FROM conversation_summaries
-               WHERE github_login = ? AND owner = ? AND repo = ?
-               ORDER BY created_at DESC LIMIT ?""",
-            (github_login, owner, repo, limit),
-        )
-        rows = await cursor.fetchall()
+    db = _db()
+    cursor = await db.execute(
+        """SELECT conversation_id, summary, key_topics, message_count, created_at
+           FROM conversation_summaries
+           WHERE github_login = ? AND owner = ? AND repo = ?
+           ORDER BY created_at DESC LIMIT ?""",
+        (github_login, owner, repo, limit),
+    )
+    rows = await cursor.fetchall()
     results = []
     for row in rows:
         topics = []
@@ -288,28 +371,27 @@ async def save_user_memory(
 ) -> None:
     """Store a long-term memory fragment for a user."""
     now = time.time()
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with _transaction() as db:
         await db.execute(
             """INSERT INTO user_memory (github_login, owner, repo, memory_type, content, created_at, expires_at)
                VALUES (?, ?, ?, ?, ?, ?, ?)""",
             (github_login, owner, repo, memory_type, content, now, expires_at),
         )
-        await db.commit()
 
 
 async def get_user_memories(github_login: str, owner: str, repo: str) -> list[dict]:
     """Get memory fragments for a user — both repo-specific and global."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        cursor = await db.execute(
-            """SELECT memory_type, content, owner, repo, created_at
-               FROM user_memory
-               WHERE github_login = ?
-                 AND ((owner = ? AND repo = ?) OR (owner = '*' AND repo = '*'))
-                 AND (expires_at IS NULL OR expires_at > ?)
-               ORDER BY created_at DESC""",
-            (github_login, owner, repo, time.time()),
-        )
-        rows = await cursor.fetchall()
+    db = _db()
+    cursor = await db.execute(
+        """SELECT memory_type, content, owner, repo, created_at
+           FROM user_memory
+           WHERE github_login = ?
+             AND ((owner = ? AND repo = ?) OR (owner = '*' AND repo = '*'))
+             AND (expires_at IS NULL OR expires_at > ?)
+           ORDER BY created_at DESC""",
+        (github_login, owner, repo, time.time()),
+    )
+    rows = await cursor.fetchall()
     return [
         {"memory_type": r[0], "content": r[1], "owner": r[2], "repo": r[3], "created_at": r[4]}
         for r in rows
@@ -318,35 +400,33 @@ async def get_user_memories(github_login: str, owner: str, repo: str) -> list[di
 
 async def delete_expired_memories() -> None:
     """Remove expired user memory entries."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with _transaction() as db:
         await db.execute(
             "DELETE FROM user_memory WHERE expires_at IS NOT NULL AND expires_at < ?",
             (time.time(),),
         )
-        await db.commit()
 
 
 async def clear_user_memory(github_login: str) -> None:
     """Clear all long-term memory for a user (GDPR-style)."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with _transaction() as db:
         await db.execute("DELETE FROM user_memory WHERE github_login = ?", (github_login,))
         await db.execute("DELETE FROM conversation_summaries WHERE github_login = ?", (github_login,))
-        await db.commit()
 
 
 async def get_user_conversations(github_login: str, limit: int = 20) -> list[dict]:
     """Get a user's past conversations with summaries."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        cursor = await db.execute(
-            """SELECT c.id, c.owner, c.repo, c.created_at, c.updated_at,
-                      cs.summary, cs.key_topics
-               FROM conversations c
-               LEFT JOIN conversation_summaries cs ON cs.conversation_id = c.id
-               WHERE c.github_login = ?
-               ORDER BY c.updated_at DESC LIMIT ?""",
-            (github_login, limit),
-        )
-        rows = await cursor.fetchall()
+    db = _db()
+    cursor = await db.execute(
+        """SELECT c.id, c.owner, c.repo, c.created_at, c.updated_at,
+                  cs.summary, cs.key_topics
+           FROM conversations c
+           LEFT JOIN conversation_summaries cs ON cs.conversation_id = c.id
+           WHERE c.github_login = ?
+           ORDER BY c.updated_at DESC LIMIT ?""",
+        (github_login, limit),
+    )
+    rows = await cursor.fetchall()
     results = []
     for row in rows:
         topics = []
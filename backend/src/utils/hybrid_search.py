@@ -1,14 +1,104 @@
 import logging
+import threading
+from collections import Counter, OrderedDict
+from collections.abc import Hashable
 
-from rank_bm25 import BM25Okapi  # type: ignore
+import numpy as np
 from langchain_core.documents import Document
 
+MAX_CACHED_BM25_INDEXES = 8
 
-def bm25_search(query: str, documents: list[Document], top_k: int = 30) -> list[Document]:
+# namespace -> (documents the index was built from, index); LRU-bounded.
+# Guarded by a lock because bm25_search runs in worker threads.
+_BM25_CACHE: OrderedDict[str, tuple[list[Document], "BM25Index"]] = OrderedDict()
+_BM25_CACHE_LOCK = threading.Lock()
+
+
+class BM25Index:
+    """Okapi BM25 with per-term scores precomputed at build time (the approach bm25s uses).
+
+    Postings are stored CSC-style: for term id t, `_doc_ids[_indptr[t]:_indptr[t + 1]]` are the
+    documents containing it and `_weights` over the same slice their BM25 contribution. Scoring a
+    query is then a handful of vectorized adds instead of a Python loop over every document.
+    IDF uses the Lucene form log(1 + (N - df + 0.5) / (df + 0.5)), which is never negative.
+    """
+
+    def __init__(self, corpus: list[list[str]], k1: float = 1.5, b: float = 0.75) -> None:
+        self.num_docs = len(corpus)
+        self._vocab: dict[str, int] = {}
+        term_ids: list[int] = []
+        doc_ids: list[int] = []
+        tfs: list[int] = []
+        for doc_id, tokens in enumerate(corpus):
+            for term, tf in Counter(tokens).items():
+                term_ids.append(self._vocab.setdefault(term, len(self._vocab)))
+                doc_ids.append(doc_id)
+                tfs.append(tf)
+
+        terms = np.array(term_ids, dtype=np.int64)
+        order = np.argsort(terms, kind="stable")
+        self._doc_ids = np.array(doc_ids, dtype=np.int64)[order]
+        tf_arr = np.array(tfs, dtype=np.float32)[order]
+
+        df = np.bincount(terms, minlength=len(self._vocab))
+        self._indptr = np.concatenate(([0], np.cumsum(df)))
+        idf = np.log1p((self.num_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+        doc_lens = np.fromiter((len(tokens) for tokens in corpus), dtype=np.float32, count=self.num_docs)
+        avgdl = float(doc_lens.mean()) if self.num_docs and doc_lens.any() else 1.0
+        length_norm = k1 * (1 - b + b * doc_lens / avgdl)
+        self._weights = idf[terms[order]] * tf_arr * (k1 + 1) / (tf_arr + length_norm[self._doc_ids])
+
+    def get_scores(self, query_tokens: list[str]) -> np.ndarray:
+        """Return the BM25 score of every document for the query, in corpus order."""
+        scores = np.zeros(self.num_docs, dtype=np.float32)
+        for token in query_tokens:
+            term_id = self._vocab.get(token)
+            if term_id is None:
+                continue
+            start, end = self._indptr[term_id], self._indptr[term_id + 1]
+            # Each document appears at most once per term, so plain fancy-index add is safe
+            scores[self._doc_ids[start:end]] += self._weights[start:end]
+        return scores
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase whitespace tokenizer shared by the BM25 corpus and queries."""
+    return text.lower().split()
+
+
+def build_bm25_index(documents: list[Document]) -> BM25Index:
+    """Build a BM25 index over the documents, in the same order as the input list."""
+    return BM25Index([tokenize(doc.page_content) for doc in documents])
+
+
+def get_bm25_index(documents: list[Document]) -> BM25Index:
+    """Return the BM25 index for a repo's chunks, building it only when the corpus changed.
+
+    Keyed by the chunks' namespace; a cached index is reused only if it was built from this
+    exact list, so a re-ingest (which produces a new list) always rebuilds.
+    """
+    namespace = documents[0].metadata.get("namespace", "")
+    with _BM25_CACHE_LOCK:
+        cached = _BM25_CACHE.get(namespace)
+        if cached is not None and cached[0] is documents:
+            _BM25_CACHE.move_to_end(namespace)
+            return cached[1]
+
+    bm25 = build_bm25_index(documents)
+    with _BM25_CACHE_LOCK:
+        _BM25_CACHE[namespace] = (documents, bm25)
+        _BM25_CACHE.move_to_end(namespace)
+        while len(_BM25_CACHE) > MAX_CACHED_BM25_INDEXES:
+            _BM25_CACHE.popitem(last=False)
+    return bm25
+
+
+def bm25_search(query_tokens: list[str], documents: list[Document], top_k: int = 30) -> list[Document]:
     """Run BM25 keyword search over cached chunks.
 
     Args:
-        query: The search query.
+        query_tokens: The search query, already passed through `tokenize`.
         documents: All cached Document chunks for the repo.
         top_k: Number of top results to return.
 
@@ -18,20 +108,34 @@ def bm25_search(query: str, documents: list[Document], top_k: int = 30) -> list[
     if not documents:
         return []
 
-    tokenized_corpus = [doc.page_content.lower().split() for doc in documents]
-    bm25 = BM25Okapi(tokenized_corpus)
-    tokenized_query = query.lower().split()
-    scores = bm25.get_scores(tokenized_query)
+    bm25 = get_bm25_index(documents)
+    scores = bm25.get_scores(query_tokens)
 
     # Get top_k indices sorted by score descending
-    scored_indices = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
-    top_indices = scored_indices[:top_k]
+    if top_k < len(scores):
+        top_indices = np.argpartition(-scores, top_k)[:top_k]
+    else:
+        top_indices = np.arange(len(scores))
+    top_indices = top_indices[np.argsort(-scores[top_indices], kind="stable")]
 
     results = [documents[i] for i in top_indices if scores[i] > 0]
-    logging.info(f"BM25 returned {len(results)} results for query: '{query[:80]}...'")
+    logging.info(f"BM25 returned {len(results)} results for {len(query_tokens)} query tokens")
     return results
 
 
+def _chunk_key(doc: Document) -> Hashable:
+    """Identify a chunk by (namespace, file_path, chunk_index) rather than hashing its full text.
+
+    Pinecone returns numeric metadata as floats, so chunk_index is normalized to int.
+    Falls back to page_content for documents without chunk metadata.
+    """
+    file_path = doc.metadata.get("file_path")
+    chunk_index = doc.metadata.get("chunk_index")
+    if file_path is None or chunk_index is None:
+        return doc.page_content
+    return (doc.metadata.get("namespace"), file_path, int(chunk_index))
+
+
 def reciprocal_rank_fusion(
     vector_results: list[Document],
     bm25_results: list[Document],
@@ -49,22 +153,34 @@ def reciprocal_rank_fusion(
     Returns:
         Top-n documents sorted by fused RRF score, deduplicated.
     """
-    rrf_scores: dict[str, float] = {}
-    doc_map: dict[str, Document] = {}
-
-    for rank, doc in enumerate(vector_results):
-        key = doc.page_content
-        rrf_scores[key] = rrf_scores.get(key, 0.0) + 1.0 / (k + rank + 1)
-        doc_map[key] = doc
-
-    for rank, doc in enumerate(bm25_results):
-        key = doc.page_content
-        rrf_scores[key] = rrf_scores.get(key, 0.0) + 1.0 / (k + rank + 1)
-        if key not in doc_map:
-            doc_map[key] = doc
-
-    sorted_keys = sorted(rrf_scores, key=lambda x: rrf_scores[x], reverse=True)
-    merged = [doc_map[key] for key in sorted_keys[:top_n]]
+    # Map each distinct chunk to a dense int id; the first occurrence wins (vector results first)
+    doc_ids: dict[Hashable, int] = {}
+    unique_docs: list[Document] = []
+
+    def _to_ids(results: list[Document]) -> np.ndarray:
+        ids = np.empty(len(results), dtype=np.intp)
+        for rank, doc in enumerate(results):
+            key = _chunk_key(doc)
+            idx = doc_ids.get(key)
+            if idx is None:
+                idx = doc_ids[key] = len(unique_docs)
+                unique_docs.append(doc)
+            ids[rank] = idx
+        return ids
+
+    vector_ids = _to_ids(vector_results)
+    bm25_ids = _to_ids(bm25_results)
+
+    scores = np.zeros(len(unique_docs), dtype=np.float32)
+    np.add.at(scores, vector_ids, 1.0 / (k + np.arange(1, len(vector_ids) + 1, dtype=np.float32)))
+    np.add.at(scores, bm25_ids, 1.0 / (k + np.arange(1, len(bm25_ids) + 1, dtype=np.float32)))
+
+    if top_n < len(scores):
+        top = np.argpartition(-scores, top_n)[:top_n]
+    else:
+        top = np.arange(len(scores))
+    top = top[np.argsort(-scores[top], kind="stable")]
+    merged = [unique_docs[i] for i in top]
 
     logging.info(
         f"RRF merged {len(vector_results)} vector + {len(bm25_results)} BM25 "
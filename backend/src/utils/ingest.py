@@ -5,6 +5,27 @@ import logging
 import shutil
 import tempfile
 
+# Shared across pre-checks and metadata fetches so GitHub connections (and TLS) are reused
+_session: aiohttp.ClientSession | None = None
+
+
+def _get_session() -> aiohttp.ClientSession:
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=10),
+            connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300),
+        )
+    return _session
+
+
+async def close_session() -> None:
+    """Close the shared ingest HTTP session. Called on app shutdown."""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
 
 async def check_repo_accessible(repo_url: str, github_token: str | None = None) -> bool | None:
     """Check if a repository exists and is accessible via the GitHub API.
@@ -13,18 +34,17 @@ async def check_repo_accessible(repo_url: str, github_token: str | None = None)
     headers: dict[str, str] = {}
     if github_token:
         headers["Authorization"] = f"Bearer {github_token}"
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(api_url, headers=headers, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                if response.status == 200:
-                    return True
-                if response.status in (404, 401):
-                    return False
-                # 403 (rate limit), 5xx, etc. — unknown
-                logging.warning(f"GitHub API returned {response.status} for {repo_url}")
-                return None
-        except Exception:
+    try:
+        async with _get_session().get(api_url, headers=headers) as response:
+            if response.status == 200:
+                return True
+            if response.status in (404, 401):
+                return False
+            # 403 (rate limit), 5xx, etc. — unknown
+            logging.warning(f"GitHub API returned {response.status} for {repo_url}")
             return None
+    except Exception:
+        return None
 
 
 async def fetch_repo_metadata(repo_url: str, github_token: str | None = None) -> dict:
@@ -34,19 +54,18 @@ async def fetch_repo_metadata(repo_url: str, github_token: str | None = None) ->
     headers: dict[str, str] = {}
     if github_token:
         headers["Authorization"] = f"Bearer {github_token}"
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(api_url, headers=headers, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return {
-                        "description": data.get("description"),
-                        "language": data.get("language"),
-                        "stargazers_count": data.get("stargazers_count", 0),
-                        "updated_at": data.get("updated_at"),
-                    }
-        except Exception:
-            pass
+    try:
+        async with _get_session().get(api_url, headers=headers) as response:
+            if response.status == 200:
+                data = await response.json()
+                return {
+                    "description": data.get("description"),
+                    "language": data.get("language"),
+                    "stargazers_count": data.get("stargazers_count", 0),
+                    "updated_at": data.get("updated_at"),
+                }
+    except Exception:
+        pass
     return {}
 
 
@@ -86,12 +105,19 @@ async def ingest_repo(repo_url: str, github_token: str | None = None) -> tuple[s
     Raises:
         ValueError: If the repo is too large, not found, or private.
     """
-    # Check if repository exists and is accessible
-    accessible = await check_repo_accessible(repo_url, github_token)
+    # Check if repository exists and is accessible; with a token, also check (concurrently)
+    # whether it's public, which decides both the error below and whether to clone
+    is_public: bool | None = None
+    if github_token:
+        accessible, is_public = await asyncio.gather(
+            check_repo_accessible(repo_url, github_token),
+            check_repo_accessible(repo_url, None),
+        )
+    else:
+        accessible = await check_repo_accessible(repo_url)
     if accessible is False:
         # Confirmed inaccessible (404/401)
         if github_token:
-            is_public = await check_repo_accessible(repo_url, None)
             if is_public is False:
                 raise ValueError("error:repo_not_installed")
             raise ValueError("error:repo_not_found")
@@ -102,8 +128,6 @@ async def ingest_repo(repo_url: str, github_token: str | None = None) -> tuple[s
     clone_dir: str | None = None
     try:
         if github_token:
-            # Check if the repo is private by trying without token
-            is_public = await check_repo_accessible(repo_url, None)
             if is_public is True:
                 # Confirmed public — direct ingest (faster, no clone needed)
                 ingest_source = repo_url
@@ -4,11 +4,14 @@ import os
 from typing import Optional
 import asyncio
 import logging
+import re
 
 load_dotenv()
 
 LLM_TIMEOUT_SECONDS = 120
 
+_SUGGESTION_RE = re.compile(r"^\d+\.\s*(.+)$")
+
 
 class KeyManager:
     def __init__(self):
@@ -142,9 +145,8 @@ Keep each question under 80 characters. Do NOT include any other text."""
         )
         text = response.content if hasattr(response, "content") else str(response)
         suggestions = []
-        import re
         for line in text.strip().splitlines():
-            match = re.match(r"^\d+\.\s*(.+)$", line.strip())
+            match = _SUGGESTION_RE.match(line.strip())
             if match:
                 suggestions.append(match.group(1).strip())
         return suggestions[:3]
@@ -1,3 +1,5 @@
+import string
+
 from langchain_core.documents import Document
 
 MODE_INSTRUCTIONS: dict[str, str] = {
@@ -33,66 +35,16 @@ MODE_INSTRUCTIONS: dict[str, str] = {
 }
 
 
-async def generate_prompt(
-    query: str, history: list[tuple[str, str]], tree: str, retrieved_chunks: list[Document],
-    summary: str = "",
-    mode: str | None = None,
-    long_term_context: str | None = None,
-) -> str:
-    """
-    Generate a prompt for the LLM to answer a query using retrieved code snippets.
-
-    Args:
-        query: The query to answer.
-        history: The history of previous interactions.
-        tree: The folder structure of the codebase.
-        retrieved_chunks: Relevant code snippets retrieved via RAG.
-        summary: High-level summary of the repository.
-
-    Returns:
-        The prompt for the LLM to answer the query.
-    """
+_SEP = "═══════════════════════════════════════════"
 
-    conversation_history = "\n".join(
-        [f"User: {q}\nAssistant: {a}" for q, a in history]
-    ) if history else "(No previous messages)"
-
-    snippets = "\n\n---\n\n".join(
-        f"**Source: `{doc.metadata.get('file_path', 'unknown')}`**\n\n{doc.page_content}"
-        for doc in retrieved_chunks
-    ) if retrieved_chunks else "(No relevant snippets found)"
-
-    prompt = f"""You are an elite senior software engineer with deep expertise across all major programming languages, frameworks, and architectures. You're the kind of engineer who can look at any codebase and immediately understand the design decisions, trade-offs, and intent behind the code.
+# Everything that doesn't change between turns goes first, so the provider's prefix cache
+# (Gemini implicit caching) can reuse it: instructions, then mode, then the repo itself.
+_STATIC_PREAMBLE = """You are an elite senior software engineer with deep expertise across all major programming languages, frameworks, and architectures. You're the kind of engineer who can look at any codebase and immediately understand the design decisions, trade-offs, and intent behind the code.
 
 You are helping the user understand and work with a GitHub repository they've shared with you. Your goal is to be so insightful and helpful that the user feels like they have a brilliant teammate who already knows this entire codebase inside-out.
 
 IMPORTANT: You are seeing the most relevant code snippets retrieved from the repository — not the entire codebase. Use the repository summary and file tree to reason about the overall architecture even if specific files aren't in the snippets. If the user asks about a specific file that isn't in the snippets, say "I don't have that file in my current context" rather than guessing code contents.
 
-═══════════════════════════════════════════
-REPOSITORY SUMMARY
-═══════════════════════════════════════════
-{summary if summary else "(No summary available)"}
-
-═══════════════════════════════════════════
-REPOSITORY STRUCTURE
-═══════════════════════════════════════════
-{tree}
-
-═══════════════════════════════════════════
-RELEVANT CODE SNIPPETS
-═══════════════════════════════════════════
-{snippets}
-
-═══════════════════════════════════════════
-CONVERSATION HISTORY
-═══════════════════════════════════════════
-{conversation_history}
-
-{"═══════════════════════════════════════════" + chr(10) + "ACTIVE MODE" + chr(10) + "═══════════════════════════════════════════" + chr(10) + MODE_INSTRUCTIONS[mode] + chr(10) + chr(10) if mode and mode in MODE_INSTRUCTIONS else ""}{"═══════════════════════════════════════════" + chr(10) + "USER CONTEXT (from previous sessions)" + chr(10) + "═══════════════════════════════════════════" + chr(10) + long_term_context + chr(10) + chr(10) if long_term_context else ""}═══════════════════════════════════════════
-CURRENT QUESTION
-═══════════════════════════════════════════
-{query}
-
 ═══════════════════════════════════════════
 HOW TO RESPOND
 ═══════════════════════════════════════════
@@ -192,4 +144,85 @@ FOLLOW-UP SUGGESTIONS:
 - Keep each under 80 characters
 - Do NOT include the suggestions section inside any code block"""
 
-    return prompt
+_MODE_BLOCKS: dict[str | None, str] = {
+    mode: f"\n\n{_SEP}\nACTIVE MODE\n{_SEP}\n{text}" for mode, text in MODE_INSTRUCTIONS.items()
+}
+_MODE_BLOCKS[None] = ""
+_USER_CONTEXT_HEADER = f"{_SEP}\nUSER CONTEXT (from previous sessions)\n{_SEP}\n"
+
+# Built once at import; per-turn content ($user_context onwards) goes last.
+# The preamble is literal text, so any '$' in it is escaped before it becomes a template.
+_PROMPT_TEMPLATE = string.Template(_STATIC_PREAMBLE.replace("$", "$$") + f"""$mode_block
+
+{_SEP}
+REPOSITORY SUMMARY
+{_SEP}
+$summary
+
+{_SEP}
+REPOSITORY STRUCTURE
+{_SEP}
+$tree
+
+$user_context{_SEP}
+RELEVANT CODE SNIPPETS
+{_SEP}
+$snippets
+
+{_SEP}
+CONVERSATION HISTORY
+{_SEP}
+$conversation_history
+
+{_SEP}
+CURRENT QUESTION
+{_SEP}
+$query
+
+Answer the CURRENT QUESTION following HOW TO RESPOND above, ending with the ---SUGGESTIONS--- block.""")
+
+
+def generate_prompt(
+    query: str, history: list[tuple[str, str]], tree: str, retrieved_chunks: list[Document],
+    summary: str = "",
+    mode: str | None = None,
+    long_term_context: str | None = None,
+) -> str:
+    """
+    Generate a prompt for the LLM to answer a query using retrieved code snippets.
+
+    The prompt is laid out as a stable prefix (instructions, mode, summary, tree) followed by
+    the per-turn suffix (user context, snippets, history, question), so consecutive turns in
+    a conversation share as long a prefix as possible.
+
+    Args:
+        query: The query to answer.
+        history: The history of previous interactions.
+        tree: The folder structure of the codebase.
+        retrieved_chunks: Relevant code snippets retrieved via RAG.
+        summary: High-level summary of the repository.
+
+    Returns:
+        The prompt for the LLM to answer the query.
+    """
+
+    conversation_history = "\n".join(
+        [f"User: {q}\nAssistant: {a}" for q, a in history]
+    ) if history else "(No previous messages)"
+
+    snippets = "\n\n---\n\n".join([
+        f"**Source: `{doc.metadata.get('file_path', 'unknown')}`**\n\n{doc.page_content}"
+        for doc in retrieved_chunks
+    ]) if retrieved_chunks else "(No relevant snippets found)"
+
+    user_context = f"{_USER_CONTEXT_HEADER}{long_term_context}\n\n" if long_term_context else ""
+
+    return _PROMPT_TEMPLATE.substitute(
+        mode_block=_MODE_BLOCKS.get(mode, ""),
+        summary=summary if summary else "(No summary available)",
+        tree=tree,
+        user_context=user_context,
+        snippets=snippets,
+        conversation_history=conversation_history,
+        query=query,
+    )
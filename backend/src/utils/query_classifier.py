@@ -2,17 +2,26 @@ import re
 
 from langchain_core.documents import Document
 
+# Gaps are bounded so the "how is ... structured" style alternatives scan in linear time;
+# an unbounded .* let a long query full of "how is " backtrack quadratically.
 BROAD_QUERY_PATTERNS = re.compile(
     r"\b("
     r"what is this repo|what does this repo|what is this project|what does this project"
     r"|overview|architecture|summary|summarize|explain the project|explain this project"
-    r"|how is .* structured|project structure|codebase overview|high.?level"
-    r"|tell me about|describe .* repo|describe .* project|walk me through"
+    r"|how is .{0,80}? structured|project structure|codebase overview|high.?level"
+    r"|tell me about|describe .{0,80}? repo|describe .{0,80}? project|walk me through"
     r"|what are the main|give me an overview|big picture"
     r")\b",
     re.IGNORECASE,
 )
 
+# Every BROAD_QUERY_PATTERNS alternative contains one of these literals, so a query with none
+# of them can't match; checking them first skips the regex for most chat messages.
+_BROAD_QUERY_KEYWORDS = (
+    "repo", "project", "overview", "architecture", "summar", "structur", "high",
+    "tell me about", "walk me through", "what are the main", "big picture",
+)
+
 BROAD_RETRIEVAL_CONFIG = {"top_k": 100, "rerank_top_n": 30}
 NORMAL_RETRIEVAL_CONFIG = {"top_k": 30, "rerank_top_n": 10}
 
@@ -23,10 +32,14 @@ MODE_QUERY_AUGMENTS: dict[str, str] = {
     "security": "security vulnerability injection authentication authorization",
     "document": "documentation API interface parameter return type",
 }
+_MODE_SUFFIX: dict[str, str] = {mode: f" {terms}" for mode, terms in MODE_QUERY_AUGMENTS.items()}
 
 
 def is_broad_query(query: str) -> bool:
     """Check if the query is a broad/overview question needing more context."""
+    lowered = query.lower()
+    if not any(keyword in lowered for keyword in _BROAD_QUERY_KEYWORDS):
+        return False
     return bool(BROAD_QUERY_PATTERNS.search(query))
 
 
@@ -38,7 +51,12 @@ def get_retrieval_config(query: str) -> dict[str, int]:
 
 
 def cap_chunks_by_token_budget(chunks: list[Document], max_chars: int = 400_000) -> list[Document]:
-    """Trim chunks to stay within a character budget to prevent exceeding context window."""
+    """Trim chunks to stay within a character budget to prevent exceeding context window.
+
+    Characters are used as a cheap proxy for tokens, so no tokenizer runs on the query path.
+    """
+    # A plain early-exit loop: at these sizes (<=100 chunks) it's faster than a numpy
+    # cumsum + searchsorted or accumulate + bisect, both of which must size every chunk first
     total = 0
     capped: list[Document] = []
     for chunk in chunks:
@@ -51,6 +69,4 @@ def cap_chunks_by_token_budget(chunks: list[Document], max_chars: int = 400_000)
 
 def augment_query_for_mode(query: str, mode: str | None) -> str:
     """Append mode-specific keywords to the retrieval query."""
-    if mode and mode in MODE_QUERY_AUGMENTS:
-        return f"{query} {MODE_QUERY_AUGMENTS[mode]}"
-    return query
+    return query + _MODE_SUFFIX.get(mode, "") if mode else query
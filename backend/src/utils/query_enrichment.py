@@ -19,15 +19,8 @@ def enrich_query_with_history(
         return query
 
     recent = history[-max_turns:]
-    context_parts: list[str] = []
-
-    for user_q, _ in recent:
-        context_parts.append(user_q)
-
+    parts = [user_q for user_q, _ in recent]
     # Add a snippet of the last assistant response for topic grounding
-    if recent:
-        last_response = recent[-1][1]
-        context_parts.append(last_response[:200])
-
-    context = " ".join(context_parts)
-    return f"{context} {query}"
+    parts.append(recent[-1][1][:200])
+    parts.append(query)
+    return " ".join(parts)
@@ -1,40 +1,54 @@
 import time
-from collections import defaultdict
+from collections import OrderedDict, deque
+
+# Hard cap on tracked keys (IPs); the least recently seen key is dropped beyond this
+MAX_TRACKED_KEYS = 100_000
 
 
 class RateLimiter:
-    """Simple in-memory sliding window rate limiter per IP."""
+    """Simple in-memory sliding window rate limiter per IP.
+
+    is_allowed has no await points, so on the event loop each check-and-record runs
+    atomically; concurrent handlers can't both slip under the limit, and no lock is needed.
+    Keep it synchronous for that reason.
+    """
 
-    def __init__(self, max_requests: int, window_seconds: int) -> None:
+    def __init__(self, max_requests: int, window_seconds: int, max_keys: int = MAX_TRACKED_KEYS) -> None:
         self.max_requests = max_requests
         self.window_seconds = window_seconds
-        self._requests: dict[str, list[float]] = defaultdict(list)
+        self.max_keys = max_keys
+        # Only the newest max_requests timestamps can decide a check, so each key holds at most
+        # that many. Keys are kept in least-recently-used order so memory stays bounded even if
+        # cleanup() never runs.
+        self._requests: OrderedDict[str, deque[float]] = OrderedDict()
 
     def is_allowed(self, key: str) -> bool:
         """Check if a request is allowed and record it if so."""
         now = time.monotonic()
-        timestamps = self._requests[key]
-
-        # Remove expired timestamps
-        cutoff = now - self.window_seconds
-        self._requests[key] = [t for t in timestamps if t > cutoff]
-        timestamps = self._requests[key]
+        timestamps = self._requests.get(key)
+        if timestamps is None:
+            timestamps = self._requests[key] = deque(maxlen=self.max_requests)
+            if len(self._requests) > self.max_keys:
+                self._requests.popitem(last=False)
+        else:
+            self._requests.move_to_end(key)
 
-        if len(timestamps) >= self.max_requests:
+        # Full window whose oldest entry hasn't expired yet: over the limit
+        if len(timestamps) == self.max_requests and timestamps[0] > now - self.window_seconds:
             return False
 
-        timestamps.append(now)
+        timestamps.append(now)  # maxlen drops the oldest
         return True
 
     def remaining(self, key: str) -> int:
         """Return how many requests are left in the current window."""
         now = time.monotonic()
         cutoff = now - self.window_seconds
-        active = [t for t in self._requests.get(key, []) if t > cutoff]
-        return max(0, self.max_requests - len(active))
+        active = sum(1 for t in self._requests.get(key, ()) if t > cutoff)
+        return max(0, self.max_requests - active)
 
     def cleanup(self) -> None:
-        """Remove stale entries to prevent memory leaks."""
+        """Remove stale entries early; the max_keys cap bounds memory regardless."""
         now = time.monotonic()
         cutoff = now - self.window_seconds
         stale_keys = [
@@ -7,15 +7,42 @@ from langchain_core.documents import Document
 JINA_API_KEY = os.getenv("JINA_API_KEY", "")
 JINA_RERANK_URL = "https://api.jina.ai/v1/rerank"
 JINA_RERANK_MODEL = "jina-reranker-v2-base-multilingual"
+# Passages are trimmed to roughly the cross-encoder's token window before upload; chunks
+# start with their "File: ..." header, so the head of each one is kept
+_RERANKER_MAX_CHARS = 1500
 
+# Reused across rerank calls so the API connection (and TLS session) stays warm
+_session: aiohttp.ClientSession | None = None
 
-async def rerank(query: str, documents: list[Document], top_n: int = 5) -> list[Document]:
+
+def _get_session() -> aiohttp.ClientSession:
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=15),
+            connector=aiohttp.TCPConnector(limit=16, keepalive_timeout=75),
+        )
+    return _session
+
+
+async def close_session() -> None:
+    """Close the shared reranker HTTP session. Called on app shutdown."""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+async def rerank(
+    query: str, documents: list[Document], top_n: int = 5, prefilter_to: int = 40,
+) -> list[Document]:
     """Rerank documents using Jina AI Reranker API and return the top_n most relevant.
 
     Args:
         query: The user's search query.
-        documents: List of LangChain Documents from vector similarity search.
+        documents: List of LangChain Documents, already ordered by hybrid (RRF) score.
         top_n: Number of top results to return.
+        prefilter_to: Only the first this-many documents are sent to the cross-encoder.
 
     Returns:
         Top-n reranked Document objects.
@@ -23,37 +50,41 @@ async def rerank(query: str, documents: list[Document], top_n: int = 5) -> list[
     if not documents:
         return []
 
+    # Cheap first stage: the RRF order already ranks by vector + BM25 agreement, so the
+    # cross-encoder only has to sort out its head (never fewer than top_n)
+    documents = documents[:max(prefilter_to, top_n)]
+
     if not JINA_API_KEY:
         logging.warning("JINA_API_KEY not set, skipping reranking")
         return documents[:top_n]
 
     # Prepare documents for Jina API
-    texts = [doc.page_content for doc in documents]
+    texts = [doc.page_content[:_RERANKER_MAX_CHARS] for doc in documents]
 
     payload = {
         "model": JINA_RERANK_MODEL,
         "query": query,
         "documents": texts,
         "top_n": top_n,
+        # Only indices and scores are used; don't have the API echo every passage back
+        "return_documents": False,
     }
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                JINA_RERANK_URL,
-                json=payload,
-                headers={
-                    "Authorization": f"Bearer {JINA_API_KEY}",
-                    "Content-Type": "application/json",
-                },
-                timeout=aiohttp.ClientTimeout(total=15),
-            ) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    logging.warning(f"Jina rerank API error ({response.status}): {error_text[:200]}")
-                    return documents[:top_n]
-
-                data = await response.json()
+        async with _get_session().post(
+            JINA_RERANK_URL,
+            json=payload,
+            headers={
+                "Authorization": f"Bearer {JINA_API_KEY}",
+                "Content-Type": "application/json",
+            },
+        ) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                logging.warning(f"Jina rerank API error ({response.status}): {error_text[:200]}")
+                return documents[:top_n]
+
+            data = await response.json()
 
         # Map results back to LangChain Documents
         reranked: list[Document] = []
@@ -0,0 +1,80 @@
+import time
+import hashlib
+from collections import OrderedDict
+
+from langchain_core.documents import Document
+
+RESPONSE_CACHE_SIZE = 512
+RESPONSE_CACHE_TTL_SECONDS = 60 * 60  # 1 hour
+
+# Key -> (stored_at, response, suggestions), least recently used first
+_cache: OrderedDict[str, tuple[float, str, list[str]]] = OrderedDict()
+
+# Namespace -> generation; bumped on re-index so answers built from old chunks stop matching
+_ns_version: dict[str, int] = {}
+
+
+def _chunk_id(doc: Document) -> str:
+    # Pinecone hands chunk_index back as a float, BM25 copies carry the original int
+    index = doc.metadata.get("chunk_index")
+    return f"{doc.metadata.get('file_path', '')}#{'' if index is None else int(index)}"
+
+
+def make_key(
+    namespace: str,
+    query: str,
+    mode: str | None,
+    chunks: list[Document],
+    history: list[tuple[str, str]],
+    long_term_context: str | None = None,
+) -> str:
+    """Digest of everything the LLM answer depends on besides the repo summary and tree.
+
+    The query is case- and whitespace-normalized. Retrieved chunks are identified by
+    file path and chunk index, order-independent. Prior turns and the user's long-term
+    context are included so a follow-up such as "explain more" can't reuse another
+    conversation's answer.
+    """
+    chunk_ids = sorted(_chunk_id(doc) for doc in chunks)
+    h = hashlib.blake2b(digest_size=16)
+    for part in (
+        namespace,
+        str(_ns_version.get(namespace, 0)),
+        mode or "",
+        " ".join(query.lower().split()),
+        ",".join(chunk_ids),
+        long_term_context or "",
+    ):
+        h.update(part.encode())
+        h.update(b"\0")
+    for q, a in history:
+        h.update(q.encode())
+        h.update(b"\0")
+        h.update(a.encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def get_response(key: str) -> tuple[str, list[str]] | None:
+    """Return a cached (response, suggestions) pair if it hasn't expired."""
+    cached = _cache.get(key)
+    if cached is None:
+        return None
+    if time.monotonic() - cached[0] >= RESPONSE_CACHE_TTL_SECONDS:
+        del _cache[key]
+        return None
+    _cache.move_to_end(key)
+    return cached[1], cached[2]
+
+
+def save_response(key: str, response: str, suggestions: list[str]) -> None:
+    """Store a finished answer, evicting the least recently used entries past the size cap."""
+    _cache[key] = (time.monotonic(), response, suggestions)
+    _cache.move_to_end(key)
+    while len(_cache) > RESPONSE_CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+def invalidate_namespace(namespace: str) -> None:
+    """Make every cached answer for a namespace unreachable; they age out of the LRU."""
+    _ns_version[namespace] = _ns_version.get(namespace, 0) + 1
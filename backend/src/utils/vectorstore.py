@@ -1,5 +1,10 @@
 import os
+import time
+import asyncio
 import logging
+from collections import OrderedDict
+from typing import Any
+from uuid import uuid4
 
 from dotenv import load_dotenv
 from pinecone import Pinecone, ServerlessSpec  # type: ignore
@@ -7,17 +12,37 @@ from langchain_community.embeddings import JinaEmbeddings  # type: ignore
 from langchain_pinecone import PineconeVectorStore  # type: ignore
 from langchain_core.documents import Document
 
+from src.utils.response_cache import invalidate_namespace
+
 load_dotenv()
 
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY", "")
 PINECONE_INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "gta-repos")
 EMBEDDING_MODEL = "jina-embeddings-v3"
 EMBEDDING_DIMENSIONS = 1024
+INDEX_BATCH_SIZE = 100
+# Vectors per Pinecone upsert request; 1024-dim vectors plus chunk text stay well under its 2MB cap
+UPSERT_BATCH_SIZE = 32
+# Metadata key PineconeVectorStore reads the page content back from at query time
+TEXT_KEY = "text"
+# Batches in flight at once while indexing; each one is an embed + upsert round trip
+INDEX_CONCURRENCY = 8
+QUERY_VECTOR_CACHE_SIZE = 1024
+QUERY_VECTOR_TTL_SECONDS = 300
+NAMESPACE_CHECK_TTL_SECONDS = 30.0
 
 # Singletons
 _pc: Pinecone | None = None
+_index: Any = None  # pinecone Index; its top-level export isn't stable across client versions
 _embeddings: JinaEmbeddings | None = None
 
+# Query text -> (embedded_at, vector), least recently used first. Query embeddings don't
+# depend on the namespace, so a repeated question skips the embedding round trip.
+_query_vec_cache: OrderedDict[str, tuple[float, list[float]]] = OrderedDict()
+
+# Namespace -> (checked_at, exists); spares a describe_index_stats call per connection
+_ns_cache: dict[str, tuple[float, bool]] = {}
+
 
 def _get_pinecone() -> Pinecone:
     global _pc
@@ -26,6 +51,13 @@ def _get_pinecone() -> Pinecone:
     return _pc
 
 
+def _get_index() -> Any:
+    global _index
+    if _index is None:
+        _index = _get_pinecone().Index(PINECONE_INDEX_NAME)
+    return _index
+
+
 def _get_embeddings() -> JinaEmbeddings:
     global _embeddings
     if _embeddings is None:
@@ -64,43 +96,94 @@ def get_vectorstore(namespace: str) -> PineconeVectorStore:
 
 
 def check_namespace_exists(namespace: str) -> bool:
-    """Check if a namespace has vectors in the index."""
-    pc = _get_pinecone()
-    index = pc.Index(PINECONE_INDEX_NAME)
-    stats = index.describe_index_stats()
+    """Check if a namespace has vectors in the index (cached for a few seconds)."""
+    now = time.monotonic()
+    cached = _ns_cache.get(namespace)
+    if cached and now - cached[0] < NAMESPACE_CHECK_TTL_SECONDS:
+        return cached[1]
+
+    stats = _get_index().describe_index_stats()
     ns_map = stats.get("namespaces", {})
-    return namespace in ns_map and ns_map[namespace].get("vector_count", 0) > 0
+    exists = namespace in ns_map and ns_map[namespace].get("vector_count", 0) > 0
+    _ns_cache[namespace] = (now, exists)
+    return exists
 
 
-def index_repo(namespace: str, documents: list[Document]) -> None:
-    """Batch upsert documents into Pinecone under the given namespace."""
+async def aindex_repo(
+    namespace: str, documents: list[Document], concurrency: int = INDEX_CONCURRENCY,
+) -> None:
+    """Embed and upsert documents into Pinecone under the given namespace, several batches at a time.
+
+    Vectors are computed once per batch and written with the raw index upsert, skipping
+    the LangChain vector store wrapper (which also writes the text into each Document's
+    own metadata dict).
+    """
     if not documents:
         logging.warning(f"No documents to index for namespace '{namespace}'")
         return
 
-    vectorstore = get_vectorstore(namespace)
-    batch_size = 100
-    for i in range(0, len(documents), batch_size):
-        batch = documents[i : i + batch_size]
-        vectorstore.add_documents(batch)
+    embeddings = _get_embeddings()
+    index = _get_index()
+    sem = asyncio.Semaphore(concurrency)
+
+    async def _index_batch(batch: list[Document]) -> None:
+        async with sem:
+            vectors = await embeddings.aembed_documents([doc.page_content for doc in batch])
+            records = [
+                (str(uuid4()), vector, doc.metadata | {TEXT_KEY: doc.page_content})
+                for doc, vector in zip(batch, vectors)
+            ]
+            for i in range(0, len(records), UPSERT_BATCH_SIZE):
+                await asyncio.to_thread(
+                    index.upsert, vectors=records[i : i + UPSERT_BATCH_SIZE], namespace=namespace,
+                )
+
+    await asyncio.gather(*[
+        _index_batch(documents[i : i + INDEX_BATCH_SIZE])
+        for i in range(0, len(documents), INDEX_BATCH_SIZE)
+    ])
+    _ns_cache.pop(namespace, None)
+    invalidate_namespace(namespace)
 
     logging.info(
         f"Indexed {len(documents)} chunks into namespace '{namespace}'"
     )
 
 
+def index_repo(namespace: str, documents: list[Document]) -> None:
+    """Synchronous wrapper around aindex_repo for callers outside the event loop."""
+    asyncio.run(aindex_repo(namespace, documents))
+
+
+async def _embed_query(query: str) -> list[float]:
+    """Embed a query, reusing a recent vector for the same text."""
+    now = time.monotonic()
+    cached = _query_vec_cache.get(query)
+    if cached and now - cached[0] < QUERY_VECTOR_TTL_SECONDS:
+        _query_vec_cache.move_to_end(query)
+        return cached[1]
+
+    vector = await _get_embeddings().aembed_query(query)
+    _query_vec_cache[query] = (now, vector)
+    _query_vec_cache.move_to_end(query)
+    while len(_query_vec_cache) > QUERY_VECTOR_CACHE_SIZE:
+        _query_vec_cache.popitem(last=False)
+    return vector
+
+
 async def query_similar(
     namespace: str, query: str, top_k: int = 20
 ) -> list[Document]:
     """Retrieve top-k similar documents from Pinecone."""
+    vector = await _embed_query(query)
     vectorstore = get_vectorstore(namespace)
-    results = await vectorstore.asimilarity_search(query, k=top_k)
+    results = await vectorstore.asimilarity_search_by_vector(vector, k=top_k)
     return results
 
 
 def delete_namespace(namespace: str) -> None:
     """Delete all vectors in a namespace for re-indexing."""
-    pc = _get_pinecone()
-    index = pc.Index(PINECONE_INDEX_NAME)
-    index.delete(delete_all=True, namespace=namespace)
+    _get_index().delete(delete_all=True, namespace=namespace)
+    _ns_cache.pop(namespace, None)
+    invalidate_namespace(namespace)
     logging.info(f"Deleted namespace '{namespace}' from Pinecone index.")
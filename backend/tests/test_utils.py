@@ -1,6 +1,13 @@
+import asyncio
+import math
+import mmap
+import random
+import re
 import pytest
 from unittest.mock import patch, AsyncMock
-from src.utils import ingest, llm, prompt
+from langchain_core.documents import Document
+from src.utils import chunker, hybrid_search, ingest, llm, prompt, response_cache
+from src.utils.rate_limit import RateLimiter
 
 
 @pytest.mark.asyncio
@@ -70,25 +77,23 @@ async def test_ingest_repo_network_error():
         assert "Network error" in str(exc.value)
 
 
-@pytest.mark.asyncio
-async def test_generate_prompt_basic():
+def test_generate_prompt_basic():
     query = "What does this repo do?"
     history = [("User", "Hello"), ("Bot", "Hi!")]
     tree = "src/\n  main.py"
     content = "def foo(): pass"
-    prompt_str = await prompt.generate_prompt(query, history, tree, content)
+    prompt_str = prompt.generate_prompt(query, history, tree, content)
     assert "What does this repo do?" in prompt_str
     assert "src/" in prompt_str
     assert "def foo()" in prompt_str
 
 
-@pytest.mark.asyncio
-async def test_generate_prompt_empty_content():
+def test_generate_prompt_empty_content():
     query = "Explain the repo."
     history = []
     tree = ""
     content = ""
-    prompt_str = await prompt.generate_prompt(query, history, tree, content)
+    prompt_str = prompt.generate_prompt(query, history, tree, content)
     assert query in prompt_str
     assert "File Content:" in prompt_str
 
@@ -139,3 +144,164 @@ async def test_generate_response_invalid_prompt():
         with pytest.raises(Exception) as exc:
             await llm.generate_response("")
         assert "INVALID_PROMPT" in str(exc.value)
+
+
+def test_reciprocal_rank_fusion_merges_and_dedupes():
+    a, b, c = Document(page_content="a"), Document(page_content="b"), Document(page_content="c")
+    merged = hybrid_search.reciprocal_rank_fusion(
+        [a, b], [Document(page_content="b"), c], top_n=2,
+    )
+    # "b" appears in both lists so it outranks "a"; the vector copy is kept
+    assert merged == [b, a]
+    assert merged[0] is b
+
+
+def test_reciprocal_rank_fusion_keys_by_chunk_metadata():
+    vec = Document(page_content="x", metadata={"file_path": "a.py", "chunk_index": 1.0})
+    bm25 = Document(page_content="x", metadata={"file_path": "a.py", "chunk_index": 1})
+    other = Document(page_content="y", metadata={"file_path": "b.py", "chunk_index": 0})
+    merged = hybrid_search.reciprocal_rank_fusion([vec], [other, bm25])
+    assert merged == [vec, other]
+
+
+def _bm25_docs(namespace: str = "test/bm25") -> list[Document]:
+    # Lengths 2, 1 and 3, so avgdl is 2 and the first document needs no length correction
+    return [
+        Document(page_content=text, metadata={"namespace": namespace})
+        for text in ("apple banana", "apple", "cherry cherry date")
+    ]
+
+
+def test_bm25_index_matches_hand_computed_scores():
+    index = hybrid_search.build_bm25_index(_bm25_docs())
+    # k1=1.5, b=0.75, idf = ln(1 + (N - df + 0.5) / (df + 0.5)) with N=3
+    idf_apple, idf_rare = math.log(1.6), math.log(8 / 3)
+    assert index.get_scores(["apple"]).tolist() == pytest.approx(
+        [idf_apple, idf_apple * 2.5 / 1.9375, 0.0], rel=1e-6,
+    )
+    # Scores of separate query terms add up
+    assert index.get_scores(["cherry", "banana"]).tolist() == pytest.approx(
+        [idf_rare, 0.0, idf_rare * 5 / 4.0625], rel=1e-6,
+    )
+
+
+def test_bm25_index_ignores_unknown_and_empty_queries():
+    index = hybrid_search.build_bm25_index(_bm25_docs())
+    assert index.get_scores(["zebra"]).tolist() == [0.0, 0.0, 0.0]
+    assert index.get_scores([]).tolist() == [0.0, 0.0, 0.0]
+
+
+def test_bm25_search_drops_zero_scores():
+    docs = _bm25_docs()
+    assert hybrid_search.bm25_search(["banana"], docs, top_k=2) == [docs[0]]
+    assert hybrid_search.bm25_search(["zebra"], docs) == []
+    assert hybrid_search.bm25_search(["apple"], [], top_k=5) == []
+
+
+def test_bm25_search_top_k_at_least_corpus_size():
+    docs = _bm25_docs()
+    # The shorter document wins on the same term frequency
+    assert hybrid_search.bm25_search(["apple"], docs, top_k=3) == [docs[1], docs[0]]
+    assert hybrid_search.bm25_search(["apple"], docs, top_k=10) == [docs[1], docs[0]]
+
+
+def test_get_bm25_index_reuses_only_for_the_same_list():
+    docs = _bm25_docs("test/bm25-cache")
+    index = hybrid_search.get_bm25_index(docs)
+    assert hybrid_search.get_bm25_index(docs) is index
+    # A re-ingest produces a new list for the namespace, which forces a rebuild
+    rebuilt = hybrid_search.get_bm25_index(list(docs))
+    assert rebuilt is not index
+    assert hybrid_search.get_bm25_index(docs) is not index
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_holds_under_concurrent_handlers():
+    limiter = RateLimiter(max_requests=5, window_seconds=60)
+
+    async def handler() -> bool:
+        await asyncio.sleep(0)
+        return limiter.is_allowed("1.2.3.4")
+
+    results = await asyncio.gather(*(handler() for _ in range(50)))
+    assert sum(results) == 5
+    assert limiter.remaining("1.2.3.4") == 0
+
+
+def test_response_cache_key_and_invalidation():
+    chunks = [
+        Document(page_content="x", metadata={"file_path": "a.py", "chunk_index": 1.0}),
+        Document(page_content="y", metadata={"file_path": "b.py", "chunk_index": 0}),
+    ]
+    key = response_cache.make_key("ns", "What does it do?", None, chunks, [])
+    # Normalized query, chunk order and float/int chunk indices don't change the key
+    assert key == response_cache.make_key(
+        "ns", "  what DOES it do? ", None,
+        [chunks[1], Document(page_content="x", metadata={"file_path": "a.py", "chunk_index": 1})],
+        [],
+    )
+    assert key != response_cache.make_key("ns", "What does it do?", "bugs", chunks, [])
+    assert key != response_cache.make_key("ns", "What does it do?", None, chunks, [("q", "a")])
+
+    response_cache.save_response(key, "answer", ["next?"])
+    assert response_cache.get_response(key) == ("answer", ["next?"])
+    response_cache.invalidate_namespace("ns")
+    assert response_cache.get_response(
+        response_cache.make_key("ns", "What does it do?", None, chunks, [])
+    ) is None
+
+
+# The original str-based parser, kept as the reference for the header pre-scan
+_REFERENCE_HEADER_RE = re.compile(chunker._FILE_HEADER_RE.pattern.decode(), re.MULTILINE)
+
+
+def _reference_parse(content: str) -> list[tuple[str, str]]:
+    splits = _REFERENCE_HEADER_RE.split(content)
+    files = []
+    for i in range(1, len(splits) - 1, 2):
+        body = splits[i + 1].strip()
+        if body:
+            files.append((splits[i].strip(), body))
+    return files
+
+
+_HEADER_EDGE_CASES = [
+    "",
+    "no headers at all\nFile: nope\n",
+    "====\nFile: a.py\n====\nprint('File: inside a body')\nFile: b.py\n",
+    # Empty body between two headers, and a header at the very end
+    "====\nFile: a.py\n====\n\n====\nFile: b.py\n====\nx = 1\n====\nFile: c.py\n====",
+    # "==" runs that aren't headers: too short, no File: line, no closing rule
+    "====\nFile: a.py\n====\n==\nFile: x\n==\n====\nplain\n====\nFile: y\nbody\n",
+    "preamble\n  ====  \nFile:   spaced path.py  \n=====\t\nbody\n",
+    "========\nFile: a.py\n========\nFile:\n====\nFile: b.md\n====\n# b\n",
+    "====\nFile: docs/résumé.md\n====\nnaïve café ✓\n====\nFile: b.py\n====\nx = 'é'\n",
+]
+
+
+def _random_gitingest_blob(rng: random.Random) -> str:
+    lines = ["====", "========", "==", "File: a.py", "File:  b/c.md ", "File:", "x = 'File: z'", "body", ""]
+    return "".join(
+        rng.choice(lines) + rng.choice(["", " ", "\t"]) + "\n"
+        for _ in range(rng.randint(0, 30))
+    )
+
+
+@pytest.mark.parametrize("content", _HEADER_EDGE_CASES)
+def test_parse_content_to_files_matches_split_reference(content, tmp_path):
+    expected = _reference_parse(content)
+    assert list(chunker.parse_content_to_files(content)) == expected
+
+    # The repo cache hands the parser a read-only mmap rather than a str
+    path = tmp_path / "content"
+    path.write_bytes(content.encode())
+    if content:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            assert list(chunker.parse_content_to_files(mm)) == expected
+
+
+def test_parse_content_to_files_matches_split_reference_randomized():
+    rng = random.Random(1234)
+    for _ in range(2000):
+        content = _random_gitingest_blob(rng)
+        assert list(chunker.parse_content_to_files(content)) == _reference_parse(content), content